@@ -1,226 +1,4623 @@
 import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import atexit
+import hashlib
 import json
+import logging
+import os
+import queue
+import random
+import socket
+import sqlite3
+import sys
 import threading
 import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import closing, contextmanager, nullcontext
+from functools import lru_cache, partial
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlencode
+
+try:
+    import aiohttp  # 仅 AsyncADS 需要,同步的 ADS 不依赖它
+except ImportError:
+    aiohttp = None
+
+# 日志默认不输出(NullHandler 使 logging.lastResort 不会把 WARNING 以上写到 stderr),
+# 需要时由调用方配置,例如 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+class ADSError(Exception):
+    """
+    Local API 返回失败(code 不为 0)时抛出的异常。
+    """
+
+
+# AdsPower Local API 频率限制: 账号级别按环境数量分档(0~200 个环境每秒 2 次, 200~5000 个每秒 5 次,
+# 5000 个以上每秒 10 次),这里默认按最低档配置;启动/创建/删除等重操作再单独限制为每秒 1 次。
+# 格式为 {端点: (每秒令牌数, 桶容量)},"*" 表示所有端点共享的全局配额。
+DEFAULT_RATE_LIMITS = {
+    "*": (2, 2),
+    "browser/start": (1, 1),
+    "user/create": (1, 1),
+    "user/delete": (1, 1),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        初始化令牌桶。
+
+        Args:
+            rate (float): 每秒补充的令牌数。
+            capacity (float, optional): 桶容量,即允许的突发请求数。默认为 max(1, rate)。
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        预订令牌并返回需要等待的秒数。
+
+        令牌不足时余额记为负数,后来者排在其后,因此多个线程按到达顺序依次放行。
+
+        Args:
+            tokens (float, optional): 需要的令牌数。默认为 1。
+
+        Returns:
+            float: 调用方需要等待的秒数,0 表示无需等待。
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        获取令牌,配额不足时阻塞等待(等待期间不持有任何锁)。
+
+        Args:
+            tokens (float, optional): 需要的令牌数。默认为 1。
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        """
+        初始化按端点划分的限流器。
+
+        Args:
+            limits (dict, optional): {端点: (每秒令牌数, 桶容量)},"*" 为全局配额。默认为 DEFAULT_RATE_LIMITS。
+        """
+        self.buckets = {}
+        for endpoint, (rate, capacity) in (DEFAULT_RATE_LIMITS if limits is None else limits).items():
+            self.buckets[endpoint] = TokenBucket(rate, capacity)
+
+    def reserve(self, endpoint):
+        """
+        为一次端点调用预订配额,需要同时满足端点配额和全局配额。
+
+        Args:
+            endpoint (str): 端点路径,例如 "browser/start"。
+
+        Returns:
+            float: 调用方需要等待的秒数,0 表示无需等待。
+        """
+        wait = 0.0
+        for key in (endpoint, "*"):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                wait = max(wait, bucket.reserve())
+        return wait
+
+    def acquire(self, endpoint):
+        """
+        为一次端点调用获取配额,配额不足时阻塞等待。
+
+        Args:
+            endpoint (str): 端点路径,例如 "browser/start"。
+        """
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class PollStrategy:
+    def __init__(self, initial=0.2, factor=1.6, max_interval=3.0, jitter=0.25):
+        """
+        初始化轮询策略:从 initial 开始按 factor 指数增长,不超过 max_interval,并加入随机抖动。
+
+        Args:
+            initial (float, optional): 第一次重新检查前的等待秒数。默认为 0.2。
+            factor (float, optional): 每次等待时间的增长倍数。默认为 1.6。
+            max_interval (float, optional): 单次等待的上限秒数。默认为 3.0。
+            jitter (float, optional): 抖动比例,实际等待在 delay * (1 ± jitter) 之间。默认为 0.25。
+        """
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        """
+        计算第 attempt 次检查未就绪后的等待秒数。
+
+        Args:
+            attempt (int): 已检查的次数,从 0 开始。
+
+        Returns:
+            float: 等待秒数。
+        """
+        delay = min(self.max_interval, self.initial * self.factor ** attempt)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+def _probe_debug_port(address, timeout=0.5):
+    """
+    直接连接浏览器的调试端口,确认浏览器已经可以接受连接。
+
+    Args:
+        address (str): 调试地址,例如 "127.0.0.1:9222"。
+        timeout (float, optional): 连接超时秒数。默认为 0.5。
+
+    Returns:
+        bool: 如果端口可以连接,返回 True,否则返回 False。
+    """
+    host, _, port = address.rpartition(":")
+    try:
+        with socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+# RetryPolicy 对失败的分类
+RETRYABLE = "retryable"  # 临时错误,按指数退避重试
+RATE_LIMITED = "rate_limited"  # 触发了 Local API 频率限制,至少等待 rate_limit_delay 再重试
+FATAL = "fatal"  # 重试也不会成功的错误,立即返回
+
+# 按 msg 关键字(不区分大小写)识别频率限制和不可重试的错误
+DEFAULT_RATE_LIMIT_PATTERNS = ("too many request", "rate limit", "frequent", "频繁")
+DEFAULT_FATAL_PATTERNS = ("not exist", "not found", "invalid", "required", "permission", "expired", "不存在", "无效",
+                          "参数错误", "权限")
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=10, rate_limit_delay=1.0, deadline=60,
+                 rate_limit_patterns=DEFAULT_RATE_LIMIT_PATTERNS, fatal_patterns=DEFAULT_FATAL_PATTERNS):
+        """
+        初始化重试策略:按响应和异常对失败分类,对可重试的失败按指数退避加随机抖动重试。
+
+        Args:
+            max_attempts (int, optional): 最多尝试次数。默认为 5。
+            base_delay (float, optional): 第一次重试前的基础等待秒数,之后每次翻倍。默认为 0.5。
+            max_delay (float, optional): 单次等待的上限秒数。默认为 10。
+            rate_limit_delay (float, optional): 触发频率限制后的最少等待秒数。默认为 1.0。
+            deadline (float, optional): 一次调用(含所有重试)的总时长上限秒数。默认为 60。
+            rate_limit_patterns (tuple, optional): 表示频率限制的 msg 关键字。默认为 DEFAULT_RATE_LIMIT_PATTERNS。
+            fatal_patterns (tuple, optional): 表示不可重试错误的 msg 关键字。默认为 DEFAULT_FATAL_PATTERNS。
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.deadline = deadline
+        self.rate_limit_patterns = tuple(pattern.lower() for pattern in rate_limit_patterns)
+        self.fatal_patterns = tuple(pattern.lower() for pattern in fatal_patterns)
+
+    def classify(self, data=None, error=None):
+        """
+        对一次失败分类。可以在子类中重写以适配其他错误信息。
+
+        Args:
+            data (dict, optional): Local API 返回的数据。默认为 None。
+            error (Exception, optional): 请求时发生的异常。默认为 None。
+
+        Returns:
+            str: RETRYABLE、RATE_LIMITED 或 FATAL。
+        """
+        if error is not None:
+            # 连接被拒绝、超时、响应不是 JSON 都可能是 AdsPower 暂时繁忙,可以重试
+            return RETRYABLE
+        msg = str((data or {}).get("msg", "")).lower()
+        if any(pattern in msg for pattern in self.rate_limit_patterns):
+            return RATE_LIMITED
+        if any(pattern in msg for pattern in self.fatal_patterns):
+            return FATAL
+        return RETRYABLE
+
+    def delay(self, attempt, kind=RETRYABLE):
+        """
+        计算第 attempt 次失败后的等待秒数。
+
+        Args:
+            attempt (int): 已失败的次数,从 0 开始。
+            kind (str, optional): 失败分类。默认为 RETRYABLE。
+
+        Returns:
+            float: 等待秒数,取 [delay/2, delay] 之间的随机值以错开并发线程的重试。
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        if kind == RATE_LIMITED:
+            delay = max(delay, self.rate_limit_delay)
+        return delay
+
+
+# 默认超时 (连接超时, 读取超时),单位秒。Local API 在本机,连接应当很快;启动浏览器可能需要较长的读取时间
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+# browser/start 的开关参数,只有取值为 1 时才会出现在查询字符串中
+_LAUNCH_FLAGS = ("open_tabs", "new_first_tab", "headless", "disable_password_filling", "clear_cache_after_closing",
+                 "enable_password_saving")
+
+
+@dataclass(frozen=True, slots=True)
+class LaunchOptions:
+    """
+    browser/start 的启动参数,参数含义见 ADS.start_browser。构造时校验并编码一次查询字符串,同一组参数可以在多次启动间复用。
+
+    launch_args 可以是字符串列表,也可以是 JSON 数组字符串,例如 '["--window-size=1920,1080"]'。
+    """
+    open_tabs: int = 0
+    ip_tab: int = 1
+    new_first_tab: int = 0
+    launch_args: str = ""
+    headless: int = 0
+    disable_password_filling: int = 0
+    clear_cache_after_closing: int = 0
+    enable_password_saving: int = 0
+    query: str = field(init=False, repr=False, compare=False)  # 编码后的查询字符串,不包括 user_id
+
+    def __post_init__(self):
+        for name in _LAUNCH_FLAGS:
+            if getattr(self, name) not in (0, 1):
+                raise ValueError(f"{name} 只能为 0 或 1: {getattr(self, name)!r}")
+        if self.ip_tab not in (0, 1, None):
+            raise ValueError(f"ip_tab 只能为 0、1 或 None: {self.ip_tab!r}")
+
+        launch_args = self.launch_args
+        if isinstance(launch_args, (list, tuple)):
+            launch_args = json.dumps(list(launch_args), separators=(",", ":"))
+        elif launch_args:
+            try:
+                parsed = json.loads(launch_args)
+            except ValueError:
+                parsed = None
+            if not isinstance(parsed, list):
+                raise ValueError(f"launch_args 应为字符串列表或 JSON 数组字符串: {launch_args!r}")
+        object.__setattr__(self, "launch_args", launch_args or "")
+
+        params = {"open_tabs": self.open_tabs, "ip_tab": self.ip_tab, "new_first_tab": self.new_first_tab,
+                  "launch_args": self.launch_args, "headless": self.headless,
+                  "disable_password_filling": self.disable_password_filling,
+                  "clear_cache_after_closing": self.clear_cache_after_closing,
+                  "enable_password_saving": self.enable_password_saving}
+        params = {key: value for key, value in params.items()
+                  if (value == 1 if key in _LAUNCH_FLAGS else value not in ("", None))}
+        object.__setattr__(self, "query", "&" + urlencode(params) if params else "")
+
+    def endpoint(self, user_id):
+        """
+        构造 browser/start 的端点路径。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            str: 带查询字符串的端点路径。
+        """
+        return f"browser/start?user_id={quote(str(user_id), safe='')}{self.query}"
+
+
+@lru_cache(maxsize=64)
+def _launch_options(*args):
+    """
+    按 start_browser 的位置参数返回 LaunchOptions,相同的参数只校验和编码一次。
+
+    Returns:
+        LaunchOptions: 启动参数。
+    """
+    return LaunchOptions(*args)
+
+
+def _profile_page_params(page, page_size, group_id, sort=None):
+    """
+    构造 user/list 分页查询参数。
+
+    Args:
+        sort (dict, optional): 排序方式,例如 {"serial_number": "desc"}。默认为 None,使用 AdsPower 的默认顺序。
+
+    Returns:
+        dict: 查询参数。
+    """
+    params = {"page": page, "page_size": page_size}
+    if group_id:
+        params["group_id"] = group_id
+    if sort:
+        params["user_sort"] = json.dumps(sort)
+    return params
+
+
+# Profile 直接保存为属性的常用字段,其余字段合并保存为一个 JSON 字符串,访问时才解析
+PROFILE_FIELDS = ("user_id", "serial_number", "name", "username", "group_id", "group_name", "ip", "remark",
+                  "created_time", "last_open_time")
+
+
+@dataclass(frozen=True, slots=True)
+class Profile:
+    """
+    浏览器用户。使用 __slots__,上万条记录占用的内存远小于原始 dict;分组以及内容相同的不常用字段会被驻留共享。
+    """
+    user_id: str
+    name: str = ""
+    username: str = ""
+    serial_number: str = ""
+    group_id: str = ""
+    group_name: str = ""
+    ip: str = ""
+    remark: str = ""
+    created_time: str = ""
+    last_open_time: str = ""
+    raw_extra: str = field(default="", repr=False, compare=False)  # 不常用字段的 JSON 字符串
+
+    @classmethod
+    def from_api(cls, item):
+        """
+        从 user/list 返回的一条记录构造 Profile。
+
+        Args:
+            item (dict): 浏览器用户记录。
+
+        Returns:
+            Profile: 浏览器用户。
+        """
+        extra = {key: value for key, value in item.items() if key not in PROFILE_FIELDS}
+        return cls(
+            user_id=str(item["user_id"]),
+            name=item.get("name") or "",
+            username=item.get("username") or "",
+            serial_number=str(item.get("serial_number") or ""),
+            group_id=sys.intern(str(item.get("group_id") or "")),
+            group_name=sys.intern(item.get("group_name") or ""),
+            ip=item.get("ip") or "",
+            remark=item.get("remark") or "",
+            created_time=str(item.get("created_time") or ""),
+            last_open_time=str(item.get("last_open_time") or ""),
+            raw_extra=sys.intern(json.dumps(extra, ensure_ascii=False, separators=(",", ":"))) if extra else "",
+        )
+
+    @property
+    def extra(self):
+        """
+        dict: 不常用字段,例如 user_proxy_config、domain_name、ip_country。每次访问都会重新解析。
+        """
+        return json.loads(self.raw_extra) if self.raw_extra else {}
+
+    @property
+    def proxy(self):
+        """
+        dict: 代理配置 user_proxy_config,没有时为空字典。
+        """
+        return self.extra.get("user_proxy_config") or {}
+
+    def to_dict(self):
+        """
+        转换为 user/list 返回的原始记录格式。
+
+        Returns:
+            dict: 浏览器用户记录。
+        """
+        item = {name: getattr(self, name) for name in PROFILE_FIELDS}
+        item.update(self.extra)
+        return item
+
+
+@dataclass(frozen=True, slots=True)
+class Group:
+    """
+    分组。
+    """
+    group_id: str
+    group_name: str = ""
+    remark: str = ""
+
+    @classmethod
+    def from_api(cls, item):
+        """
+        从 group/list 返回的一条记录构造 Group。
+
+        Args:
+            item (dict): 分组记录。
+
+        Returns:
+            Group: 分组。
+        """
+        return cls(str(item["group_id"]), item.get("group_name") or "", item.get("remark") or "")  # 备注字段可能不存在
+
+    def to_dict(self):
+        """
+        转换为 get_group 使用的格式。
+
+        Returns:
+            dict: 包含 group_id、group_name、remark 的字典。
+        """
+        return {"group_id": self.group_id, "group_name": self.group_name, "remark": self.remark}
+
+
+@dataclass(slots=True)
+class BrowserSession:
+    """
+    已启动的浏览器实例。
+    """
+    user_id: str
+    webdriver: str
+    debug_port: str  # Selenium 使用的调试地址,例如 "127.0.0.1:9222"
+    puppeteer: str = ""  # Puppeteer/CDP 使用的 WebSocket 地址
+    started_at: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)  # ActiveTracker 最后一次扫描到它的时间
+
+    @classmethod
+    def from_api(cls, user_id, data):
+        """
+        从 browser/start、browser/active 或 browser/local-active 返回的数据构造 BrowserSession。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+            data (dict): 浏览器信息。
+
+        Returns:
+            BrowserSession: 浏览器实例。
+        """
+        ws = data.get("ws") or {}
+        return cls(user_id, data.get("webdriver"), ws.get("selenium"), ws.get("puppeteer") or "")
+
+
+class ProfileIndex:
+    def __init__(self, profiles=()):
+        """
+        初始化按 ID 和名称建立索引的只读浏览器用户集合,可以在多个线程间共享。
+
+        Args:
+            profiles (iterable, optional): Profile 对象。默认为空。
+        """
+        self._by_id = {}
+        self._by_name = {}
+        for profile in profiles:
+            self._by_id[profile.user_id] = profile
+            self._by_name.setdefault(profile.name, []).append(profile)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, user_id):
+        return user_id in self._by_id
+
+    def get(self, user_id, default=None):
+        """
+        按 ID 查找浏览器用户。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+            default (optional): 找不到时返回的值。默认为 None。
+
+        Returns:
+            Profile: 浏览器用户或 default。
+        """
+        return self._by_id.get(user_id, default)
+
+    def find(self, name):
+        """
+        按名称查找浏览器用户,名称可能重复。
+
+        Args:
+            name (str): 浏览器用户的名称。
+
+        Returns:
+            list: 名称相同的 Profile,找不到时为空列表。
+        """
+        return list(self._by_name.get(name, ()))
+
+    def in_group(self, group_id):
+        """
+        列出指定分组中的浏览器用户。
+
+        Args:
+            group_id (str): 组 ID。
+
+        Returns:
+            list: 该分组中的 Profile。
+        """
+        return [profile for profile in self._by_id.values() if profile.group_id == str(group_id)]
+
+
+class ProfileStore:
+    def __init__(self, path):
+        """
+        初始化保存在 SQLite 中的浏览器用户和分组索引,进程重启后无需重新列出全部浏览器用户。
+
+        由 ADS.sync_profiles 增量同步,ADS 的创建、删除、启动和停止会直接写入。可以在多个线程间共享。
+
+        Args:
+            path (str): 数据库文件路径,":memory:" 表示只保存在内存中。
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    user_id TEXT PRIMARY KEY,
+                    serial_number INTEGER NOT NULL DEFAULT 0,
+                    name TEXT NOT NULL DEFAULT '',
+                    username TEXT NOT NULL DEFAULT '',
+                    group_id TEXT NOT NULL DEFAULT '',
+                    group_name TEXT NOT NULL DEFAULT '',
+                    ip TEXT NOT NULL DEFAULT '',
+                    remark TEXT NOT NULL DEFAULT '',
+                    created_time TEXT NOT NULL DEFAULT '',
+                    last_open_time TEXT NOT NULL DEFAULT '',
+                    proxy_host TEXT NOT NULL DEFAULT '',
+                    raw_extra TEXT NOT NULL DEFAULT '',
+                    active INTEGER NOT NULL DEFAULT 0,
+                    generation INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS profiles_name ON profiles (name);
+                CREATE INDEX IF NOT EXISTS profiles_group ON profiles (group_id);
+                CREATE INDEX IF NOT EXISTS profiles_proxy_host ON profiles (proxy_host);
+                CREATE INDEX IF NOT EXISTS profiles_serial ON profiles (serial_number);
+                CREATE TABLE IF NOT EXISTS groups (
+                    group_id TEXT PRIMARY KEY,
+                    group_name TEXT NOT NULL DEFAULT '',
+                    remark TEXT NOT NULL DEFAULT ''
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+
+    def close(self):
+        """
+        关闭数据库连接。
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        """
+        读取一个元数据,例如 "last_sync"。
+
+        Returns:
+            str: 元数据的值或 default。
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        """
+        写入一个元数据。
+        """
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def upsert(self, profiles, generation=None):
+        """
+        写入或更新浏览器用户,保留已有的活动状态。
+
+        Args:
+            profiles (iterable): Profile 对象。
+            generation (int, optional): 全量同步的代号,replace_all 使用。默认为 None,沿用当前代号。
+
+        Returns:
+            int: 写入的条数。
+        """
+        if generation is None:
+            generation = int(self.get_meta("generation", 0))
+        rows = [(profile.user_id, int(profile.serial_number or 0), profile.name, profile.username, profile.group_id,
+                 profile.group_name, profile.ip, profile.remark, profile.created_time, profile.last_open_time,
+                 str(profile.proxy.get("proxy_host") or ""), profile.raw_extra, generation) for profile in profiles]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO profiles (user_id, serial_number, name, username, group_id, group_name, ip, remark,
+                                      created_time, last_open_time, proxy_host, raw_extra, generation)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    serial_number = excluded.serial_number, name = excluded.name, username = excluded.username,
+                    group_id = excluded.group_id, group_name = excluded.group_name, ip = excluded.ip,
+                    remark = excluded.remark, created_time = excluded.created_time,
+                    last_open_time = excluded.last_open_time, proxy_host = excluded.proxy_host,
+                    raw_extra = excluded.raw_extra, generation = excluded.generation
+            """, rows)
+        return len(rows)
+
+    def replace_all(self, profiles, batch_size=500):
+        """
+        用一次全量列表替换所有浏览器用户,边读取边分批写入;列表中没有的浏览器用户会被删除。
+
+        Args:
+            profiles (iterable): Profile 对象。
+            batch_size (int, optional): 每批写入的条数。默认为 500。
+
+        Returns:
+            tuple: (写入的条数, 删除的条数)。
+        """
+        generation = int(self.get_meta("generation", 0)) + 1
+        written = 0
+        batch = []
+        for profile in profiles:
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                written += self.upsert(batch, generation)
+                batch = []
+        written += self.upsert(batch, generation)
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM profiles WHERE generation < ?", (generation,)).rowcount
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation),))
+        return written, removed
+
+    def remove(self, user_ids):
+        """
+        删除浏览器用户。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+        """
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM profiles WHERE user_id = ?", [(user_id,) for user_id in user_ids])
+
+    def set_active(self, user_ids, active):
+        """
+        记录浏览器是否处于活动状态。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            active (bool): 是否处于活动状态。
+        """
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE profiles SET active = ? WHERE user_id = ?",
+                                   [(int(active), user_id) for user_id in user_ids])
+
+    def max_serial(self):
+        """
+        Returns:
+            int: 已保存的最大序号,没有浏览器用户时为 0。
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(serial_number), 0) FROM profiles").fetchone()[0]
+
+    def _profiles(self, where="", args=()):
+        columns = ("user_id", "name", "username", "serial_number", "group_id", "group_name", "ip", "remark",
+                   "created_time", "last_open_time", "raw_extra")
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM profiles {where}", args).fetchall()
+        return [Profile(user_id, name, username, str(serial or ""), sys.intern(group_id), sys.intern(group_name), ip,
+                        remark, created_time, last_open_time, sys.intern(raw_extra))
+                for user_id, name, username, serial, group_id, group_name, ip, remark, created_time, last_open_time,
+                raw_extra in rows]
+
+    def get(self, user_id):
+        """
+        按 ID 查找浏览器用户。
+
+        Returns:
+            Profile: 浏览器用户,不存在时为 None。
+        """
+        profiles = self._profiles("WHERE user_id = ?", (user_id,))
+        return profiles[0] if profiles else None
+
+    def find(self, name=None, group_id=None, proxy_host=None, active=None, limit=None):
+        """
+        按条件查找浏览器用户,多个条件同时满足,结果按序号排序。
+
+        Args:
+            name (str, optional): 名称。默认为 None,不限制。
+            group_id (str, optional): 组 ID。默认为 None,不限制。
+            proxy_host (str, optional): 代理主机。默认为 None,不限制。
+            active (bool, optional): 是否处于活动状态。默认为 None,不限制。
+            limit (int, optional): 最多返回的条数。默认为 None,不限制。
+
+        Returns:
+            list: Profile 对象。
+        """
+        conditions, args = [], []
+        for column, value in (("name", name), ("group_id", group_id), ("proxy_host", proxy_host)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                args.append(str(value))
+        if active is not None:
+            conditions.append("active = ?")
+            args.append(int(active))
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        where += " ORDER BY serial_number"
+        if limit is not None:
+            where += " LIMIT ?"
+            args.append(int(limit))
+        return self._profiles(where, args)
+
+    def set_groups(self, groups):
+        """
+        用最新的分组列表替换已保存的分组。
+
+        Args:
+            groups (iterable): Group 对象。
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM groups")
+            self._conn.executemany("INSERT INTO groups (group_id, group_name, remark) VALUES (?, ?, ?)",
+                                   [(group.group_id, group.group_name, group.remark) for group in groups])
+
+    def groups(self):
+        """
+        Returns:
+            list: 已保存的 Group 对象。
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT group_id, group_name, remark FROM groups ORDER BY group_id").fetchall()
+        return [Group(*row) for row in rows]
+
+
+class Checkpoint:
+    def __init__(self, path):
+        """
+        初始化批量操作的进度检查点:每完成一项就向文件追加一行,中断后用同一个文件重新运行时跳过已完成的项。
+
+        每行记录 user_id 和目标值(例如代理配置的摘要或组 ID),目标值不同的重新运行不会被跳过。
+        目标值以明文写入文件,不要直接使用含有密码等敏感信息的值。
+
+        Args:
+            path (str): 检查点文件路径,不存在时自动创建。
+        """
+        self.path = path
+        self._done = set()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    user_id, _, target = line.rstrip("\n").partition("\t")
+                    if user_id:
+                        self._done.add((user_id, target))
+        except FileNotFoundError:
+            pass
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._done)
+
+    def __contains__(self, item):
+        return item in self._done
+
+    def mark(self, items):
+        """
+        记录已完成的项并刷新到文件。
+
+        Args:
+            items (iterable): (user_id, 目标值) 元组。
+        """
+        items = list(items)
+        with self._lock:
+            self._file.write("".join(f"{user_id}\t{target}\n" for user_id, target in items))
+            self._file.flush()
+            self._done.update(items)
+
+    def close(self):
+        """
+        关闭检查点文件。
+        """
+        with self._lock:
+            self._file.close()
+
+
+def _open_private(path, mode="a"):
+    """
+    以只有当前用户可读写(0600)的权限打开文本文件,文件不存在时创建。
+
+    Args:
+        path (str): 文件路径。
+        mode (str, optional): "a" 追加或 "w" 覆盖。默认为 "a"。
+
+    Returns:
+        file: 打开的文件对象。
+    """
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if mode == "a" else os.O_TRUNC)
+    return os.fdopen(os.open(path, flags, 0o600), mode, encoding="utf-8")
+
+
+# 不写入 journal 的 create 字段,resume 重新创建时由调用方通过 credentials 提供
+JOURNAL_REDACTED_FIELDS = ("proxy_password", "cookie")
+
+
+class Journal:
+    def __init__(self, path):
+        """
+        初始化生命周期操作的预写日志:每个操作开始前追加一条意图记录,结束后追加一条结果记录(JSON Lines)。
+        进程中断后,用同一个文件构造 Journal 并调用 ADS.resume 即可只处理未完成的操作。
+
+        写入由后台线程批量完成:同一时刻的多条记录共用一次 fsync(组提交)。意图记录等到 fsync 完成才返回,
+        结果记录不等待;结果记录丢失时 resume 会按服务端的实际状态对账。
+
+        日志文件以 0600 权限创建。create 的代理密码和 Cookie 不写入文件,见 JOURNAL_REDACTED_FIELDS。
+
+        Args:
+            path (str): 日志文件路径,不存在时自动创建。
+        """
+        self.path = path
+        self._open = {}  # 操作 ID -> 未完成(意图或失败)的操作记录
+        self._in_flight = set()  # 本进程中正在进行的操作 ID
+        self._next_id = 1
+        self._load()
+        self._file = _open_private(path)
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # 保护 self._file,写入和 compact 互斥
+        self._buffer = []
+        self._appended = 0  # 已追加到缓冲区的记录数
+        self._synced = 0  # 已 fsync 的记录数
+        self._closed = False
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 进程中断时最后一行可能不完整
+                    op_id = record["id"]
+                    self._next_id = max(self._next_id, op_id + 1)
+                    if record["state"] == "intent":
+                        self._open[op_id] = record
+                    elif record["state"] == "done":
+                        self._open.pop(op_id, None)
+                    elif op_id in self._open:
+                        self._open[op_id].update(record)  # 失败记录合并到意图记录中,例如剩余未删除的 ID
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self):
+        """
+        bool: 日志是否已关闭。
+        """
+        return self._closed
+
+    def _encode(self, record):
+        """
+        去掉 create 请求数据中的敏感字段并序列化一条记录。被去掉的字段名记录在 "redacted" 中。
+
+        Returns:
+            tuple: (去掉敏感字段后的记录, 要追加的行)。
+        """
+        payload = record.get("payload")
+        if payload is not None:
+            redacted = []
+            config = payload.get("user_proxy_config") or {}
+            if config.get("proxy_password"):
+                payload = dict(payload, user_proxy_config=dict(config, proxy_password=""))
+                redacted.append("proxy_password")
+            if payload.get("cookie"):
+                payload = {key: value for key, value in payload.items() if key != "cookie"}
+                redacted.append("cookie")
+            record = dict(record, payload=payload)
+            if redacted:
+                record["redacted"] = redacted
+        return record, json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _append(self, lines, wait):
+        with self._cond:
+            if self._closed:
+                raise ValueError("Journal 已关闭")
+            self._buffer.extend(lines)
+            self._appended += len(lines)
+            target = self._appended
+            self._cond.notify_all()
+            while wait and self._synced < target and not self._closed:
+                self._cond.wait()
+
+    def begin(self, op, **fields):
+        """
+        记录一个操作的意图,等到写入磁盘后返回。
+
+        Args:
+            op (str): 操作类型,"create"、"delete"、"start" 或 "stop"。
+            **fields: 恢复操作所需的数据,例如 user_ids、payload。
+
+        Returns:
+            int: 操作 ID。
+        """
+        with self._cond:
+            op_id = self._next_id
+            self._next_id += 1
+            record, line = self._encode(dict({"id": op_id, "op": op, "state": "intent", "time": time.time()}, **fields))
+            self._open[op_id] = record
+            self._in_flight.add(op_id)
+        self._append([line], wait=True)
+        return op_id
+
+    def finish(self, op_id, ok, **fields):
+        """
+        记录一个操作的结果,不等待写入磁盘。失败的操作仍视为未完成,resume 时会重试。
+
+        Args:
+            op_id (int): begin 返回的操作 ID。
+            ok (bool): 是否成功。
+            **fields: 结果数据,例如新建的 user_id、剩余未删除的 user_ids。
+        """
+        record = dict({"id": op_id, "state": "done" if ok else "failed"}, **fields)
+        with self._cond:
+            self._in_flight.discard(op_id)
+            if ok:
+                self._open.pop(op_id, None)
+            elif op_id in self._open:
+                self._open[op_id].update(record)
+        self._append([json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"], wait=False)
+
+    def unfinished(self):
+        """
+        获取未完成的操作:上次运行中只有意图没有结果的操作,以及失败的操作。本进程中正在进行的操作不包括在内。
+
+        Returns:
+            list: 操作记录,按操作 ID 排序。create 的 payload 不含 "redacted" 中列出的字段。
+        """
+        with self._cond:
+            return [dict(record) for op_id, record in sorted(self._open.items()) if op_id not in self._in_flight]
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                lines, self._buffer = self._buffer, []
+                target = self._appended
+            with self._io_lock:
+                self._file.write("".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            with self._cond:
+                self._synced = max(self._synced, target)
+                self._cond.notify_all()
+
+    def compact(self):
+        """
+        重写日志文件,只保留未完成的操作,防止文件无限增长。先写入临时文件再替换,中断时原文件不受影响。
+        """
+        with self._io_lock, self._cond:
+            self._buffer = []  # 缓冲区中的记录都已反映在 self._open 中
+            temp_path = self.path + ".tmp"
+            with _open_private(temp_path, "w") as f:
+                f.write("".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                for record in self._open.values()))
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = _open_private(self.path)
+            self._synced = self._appended
+            self._cond.notify_all()
+
+    def close(self):
+        """
+        写入剩余的记录并关闭日志文件。
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._io_lock:
+            self._file.close()
+
+
+def _browser_info(profile):
+    """
+    把 Profile 转换为 get_browser 使用的精简格式。
+
+    Returns:
+        dict: 包含 id、name、user 的字典。
+    """
+    return {
+        "id": profile.user_id,
+        "name": profile.name,
+        "user": profile.username
+    }
+
+
+# Cookie 的有效字段,其余字段在规范化时丢弃
+_COOKIE_FIELDS = ("domain", "path", "name", "value", "expirationDate", "httpOnly", "secure", "sameSite", "hostOnly",
+                  "session")
+
+
+def _normalize_cookie(cookie):
+    """
+    把一条 Cookie 规范化为 AdsPower 使用的 JSON 格式,兼容 Selenium 的 "expiry" 和 Netscape/Playwright 的 "expires"。
+
+    Args:
+        cookie (dict): Cookie。
+
+    Returns:
+        dict: 规范化后的 Cookie。
+
+    Raises:
+        ValueError: 缺少 name 或 domain。
+    """
+    if not cookie.get("name") or not cookie.get("domain"):
+        raise ValueError(f"Cookie 缺少 name 或 domain: {cookie}")
+    expires = cookie.get("expirationDate", cookie.get("expiry", cookie.get("expires")))
+    normalized = {key: cookie[key] for key in _COOKIE_FIELDS if key in cookie}
+    normalized["path"] = cookie.get("path") or "/"
+    normalized["value"] = str(cookie.get("value", ""))
+    if expires not in (None, "", -1):
+        normalized["expirationDate"] = float(expires)
+    else:
+        normalized.pop("expirationDate", None)
+        normalized["session"] = True
+    return normalized
+
+
+def _parse_cookie_line(line):
+    """
+    解析 JSON Lines 或 Netscape cookies.txt 中的一行。
+
+    Args:
+        line (str): 一行文本。
+
+    Returns:
+        dict: Cookie,空行和注释行返回 None。
+
+    Raises:
+        ValueError: 无法识别的行。
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        return json.loads(line)
+    http_only = line.startswith("#HttpOnly_")
+    if http_only:
+        line = line[len("#HttpOnly_"):]
+    elif not line or line.startswith("#"):
+        return None
+    fields = line.split("\t")
+    if len(fields) != 7:
+        raise ValueError(f"无法识别的 Cookie 行: {line[:100]}")
+    domain, _, path, secure, expires, name, value = fields
+    return {"domain": domain, "path": path, "secure": secure.upper() == "TRUE", "httpOnly": http_only,
+            "expirationDate": int(expires) if expires not in ("", "0") else None, "name": name, "value": value}
+
+
+def _iter_cookie_file(f):
+    """
+    逐条读取 Cookie 文件。支持 JSON 数组、每行一条的 JSON Lines 和 Netscape cookies.txt,后两种逐行读取。
+
+    Args:
+        f (file): 以文本方式打开的文件。
+
+    Yields:
+        dict: Cookie。
+    """
+    head = f.read(1)
+    while head.isspace():
+        head = f.read(1)
+    if not head:
+        return
+    if head == "[":
+        yield from json.loads(head + f.read())  # JSON 数组只能整体解析
+        return
+    cookie = _parse_cookie_line(head + f.readline())  # 第一行的首字符已经读出
+    if cookie is not None:
+        yield cookie
+    for line in f:
+        cookie = _parse_cookie_line(line)
+        if cookie is not None:
+            yield cookie
+
+
+class CookieJar:
+    def __init__(self, cookies=()):
+        """
+        初始化可以在多个浏览器用户之间共享的 Cookie。规范化、去重和 JSON 序列化只在构造时进行一次,
+        之后只保存序列化后的请求片段,创建浏览器用户时直接拼接进请求数据,不再为每个浏览器用户复制和转义。
+
+        Args:
+            cookies (iterable, optional): Cookie,每个为 dict。同一 (domain, path, name) 保留最后一条。默认为空。
+
+        Raises:
+            ValueError: Cookie 缺少 name 或 domain。
+        """
+        unique = {}
+        for cookie in cookies:
+            cookie = _normalize_cookie(cookie)
+            unique[(cookie["domain"], cookie["path"], cookie["name"])] = cookie
+        self._count = len(unique)
+        # user/create 的 cookie 字段是 JSON 字符串,这里保存的是它在请求 JSON 中的编码(即再编码一次)
+        self.fragment = json.dumps(json.dumps(list(unique.values()), ensure_ascii=False, separators=(",", ":")),
+                                   ensure_ascii=False).encode()
+
+    @classmethod
+    def load(cls, source):
+        """
+        从文件或可迭代对象加载 Cookie,逐条读取,不保留原始内容。
+
+        Args:
+            source (str, os.PathLike, file or iterable): 文件路径、已打开的文本文件,或 Cookie dict 的可迭代对象。
+                文件可以是 JSON 数组、JSON Lines 或 Netscape cookies.txt。
+
+        Returns:
+            CookieJar: Cookie。
+
+        Raises:
+            ValueError: 文件格式无法识别,或 Cookie 缺少 name 或 domain。
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding="utf-8") as f:
+                return cls(_iter_cookie_file(f))
+        if hasattr(source, "read"):
+            return cls(_iter_cookie_file(source))
+        return cls(source)
+
+    @classmethod
+    def from_fragment(cls, fragment):
+        """
+        用序列化好的请求片段还原 CookieJar,例如从 Journal 恢复。
+
+        Args:
+            fragment (bytes): CookieJar.fragment。
+
+        Returns:
+            CookieJar: Cookie。
+        """
+        jar = cls.__new__(cls)
+        jar.fragment = fragment
+        jar._count = len(json.loads(json.loads(fragment)))
+        return jar
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return f"CookieJar({self._count} cookies, {len(self.fragment)} bytes)"
+
+    def to_list(self):
+        """
+        还原为 Cookie 列表。
+
+        Returns:
+            list: 规范化后的 Cookie。
+        """
+        return json.loads(json.loads(self.fragment))
+
+
+def _encode_payload(payload):
+    """
+    把请求数据编码为 JSON。CookieJar 直接使用其序列化好的片段。
+
+    Args:
+        payload (dict): 请求数据。
+
+    Returns:
+        bytes: JSON 编码的请求体。
+    """
+    parts = []
+    for key, value in payload.items():
+        parts.append(json.dumps(key).encode() + b":" + (
+            value.fragment if isinstance(value, CookieJar) else json.dumps(value, ensure_ascii=False).encode()))
+    return b"{" + b",".join(parts) + b"}"
+
+
+@lru_cache(maxsize=16)
+def _load_cookie_file(path, mtime_ns, size):
+    """
+    加载 Cookie 文件,同一文件未修改时只加载一次。mtime_ns 和 size 只用作缓存键。
+
+    Returns:
+        CookieJar: Cookie。
+    """
+    return CookieJar.load(path)
+
+
+def _proxy_config(proxy):
+    """
+    把代理转换为 user_proxy_config。
+
+    Args:
+        proxy: (类型, 主机, 端口[, 用户名[, 密码]])、user_proxy_config 格式的 dict,或 None 表示不使用代理。
+
+    Returns:
+        dict: user_proxy_config。
+
+    Raises:
+        ValueError: 代理不合法,例如端口不是整数。
+    """
+    if not proxy:
+        return {"proxy_soft": "no_proxy"}
+    if isinstance(proxy, dict):
+        return dict(proxy)
+    if not 3 <= len(proxy) <= 5:
+        raise ValueError(f"代理应为 (类型, 主机, 端口[, 用户名[, 密码]]): {proxy}")
+    proxy_type, proxy_host, proxy_port, proxy_user, proxy_password = tuple(proxy) + ("",) * (5 - len(proxy))
+    return {
+        "proxy_soft": "other",
+        "proxy_type": proxy_type,
+        "proxy_host": proxy_host,
+        "proxy_port": int(proxy_port),
+        "proxy_user": proxy_user,
+        "proxy_password": proxy_password
+    }
+
+
+def _create_payload(name, proxy, group_id, cookies):
+    """
+    构造 user/create 的请求数据,name、group_id 和 cookies 的含义见 ADS.create。
+
+    Args:
+        proxy: 代理,格式见 _proxy_config。
+
+    Returns:
+        dict: 请求数据。
+    """
+    payload = {
+        "name": name,
+        "group_id": group_id,
+        "fingerprint_config": {
+            "webrtc": "proxy"
+        }
+    }
+
+    cookies = _resolve_cookies(cookies)
+    if cookies:
+        payload["cookie"] = cookies
+
+    payload["user_proxy_config"] = _proxy_config(proxy)
+    return payload
+
+
+def _resolve_cookies(cookies):
+    """
+    把 Cookie 文件路径转换为 CookieJar,同一文件只加载一次;其他值原样返回。
+
+    Args:
+        cookies (str, CookieJar or os.PathLike): Cookie。
+
+    Returns:
+        str or CookieJar: 可以放入请求数据的 Cookie。
+    """
+    if isinstance(cookies, os.PathLike):
+        stat = os.stat(cookies)
+        return _load_cookie_file(os.fspath(cookies), stat.st_mtime_ns, stat.st_size)
+    return cookies
+
+
+# 端点所属的并发类别,未列出的端点都属于只读的 "listing"
+ENDPOINT_CLASSES = {
+    "browser/start": "lifecycle",
+    "browser/stop": "lifecycle",
+    "user/create": "crud",
+    "user/delete": "crud",
+    "user/update": "crud",
+    "user/regroup": "crud",
+    "group/create": "crud",
+}
+
+# _with_retry 的操作名称对应的端点,用作 ads_api_errors_total 的 endpoint 标签
+OPERATION_ENDPOINTS = {
+    "start_browser": "browser/start",
+    "stop_browser": "browser/stop",
+    "create": "user/create",
+    "del_browser": "user/delete",
+    "update_proxy": "user/update",
+    "move_to_group": "user/regroup",
+}
+
+# 各类别同时进行中的请求数上限。启动/停止浏览器耗时长,只读查询很快,分开限制后查询不会排在启动后面
+DEFAULT_CONCURRENCY = {
+    "lifecycle": 4,
+    "crud": 2,
+    "listing": 16,
+}
+
+
+class ProfileLocks:
+    def __init__(self):
+        """
+        初始化按浏览器用户 ID 划分的锁,同一用户的操作按顺序执行,不同用户之间互不影响。
+        """
+        self._locks = {}  # user_id -> [锁, 引用计数]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, user_id):
+        """
+        持有指定浏览器用户的锁。没有线程持有或等待时锁会被回收,不会随用户数量无限增长。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+        """
+        with self._lock:
+            entry = self._locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[user_id]
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        初始化请求合并器:同一个键同时只执行一次,并发的相同调用等待并共享这一次的结果或异常。
+        """
+        self._calls = {}  # key -> [完成事件, 结果, 异常]
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        执行 fn,如果同一个键已有调用正在进行,则等待它完成并返回相同的结果。
+
+        Args:
+            key: 调用的键,例如 ("GET", "browser/local-active")。
+            fn (callable): 无参数的函数。
+
+        Returns:
+            tuple: (结果, 是否共享了其他线程的调用)。
+
+        Raises:
+            Exception: fn 抛出的异常,所有等待的调用都会收到同一个异常。
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1], True
+
+        try:
+            call[1] = fn()
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+        return call[1], False
+
+
+# browser/local-active 返回这些 HTTP 状态码时说明当前 AdsPower 版本没有该接口
+LOCAL_ACTIVE_UNSUPPORTED_STATUS = (404, 405, 501)
+# browser/local-active 暂时失败(限流、临时错误页等)后暂停查询的最长秒数,实际按 retry_policy 指数退避
+LOCAL_ACTIVE_MAX_BACKOFF = 30
+
+# 各类资源的缓存有效期(秒),0 表示不缓存。分组几乎不变,浏览器用户列表和单个用户信息变化较快;
+# "active" 是 browser/local-active 的快照,并发的状态检查在这段时间内共用一次查询,本实例启动或停止浏览器时立即失效
+DEFAULT_CACHE_TTLS = {
+    "groups": 300,
+    "profiles": 30,
+    "info": 30,
+    "active": 0.2,
+}
+
+
+class TTLCache:
+    def __init__(self, maxsize=1024):
+        """
+        初始化带过期时间和 LRU 淘汰的线程安全缓存。
+
+        Args:
+            maxsize (int, optional): 最多缓存的条目数,超过后淘汰最久未使用的条目。默认为 1024。
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        获取缓存值。
+
+        Args:
+            key: 缓存键。
+            default (optional): 未命中或已过期时返回的值。默认为 None。
+
+        Returns:
+            缓存值或 default。
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        """
+        写入缓存值。
+
+        Args:
+            key: 缓存键。
+            value: 缓存值。
+            ttl (float): 有效期秒数,不大于 0 时不写入。
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """
+        删除一个缓存条目。
+
+        Args:
+            key: 缓存键。
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self, resource=None):
+        """
+        清空缓存。
+
+        Args:
+            resource (str, optional): 只清空键的第一个元素等于 resource 的条目。默认为 None,全部清空。
+        """
+        with self._lock:
+            if resource is None:
+                self._data.clear()
+                return
+            for key in [key for key in self._data if key[0] == resource]:
+                del self._data[key]
+
+
+# 直方图默认的桶上界(秒),覆盖从毫秒级的查询到数十秒的浏览器启动
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class MetricsSink:
+    """
+    指标接收器的接口,默认实现什么也不做。可以继承并重写 increment 和 observe,把指标转发到 StatsD 等系统。
+
+    ADS 记录的指标:
+        ads_requests_total{endpoint, status}: 请求次数,status 为 HTTP 状态码或异常类名。
+        ads_request_seconds{endpoint}: 请求耗时。
+        ads_rate_limit_wait_seconds{endpoint}: 因限流等待的时间。
+        ads_lock_wait_seconds{lock}: 等待端点类别并发名额("lifecycle" 等)或浏览器用户锁("profile")的时间。
+        ads_failures_total{operation, kind}: 失败次数,kind 为 RetryPolicy 的分类。
+        ads_retries_total{operation}: 重试次数。
+        ads_operations_total{operation, result}: 操作的最终结果,result 为 "ok" 或 "failed"。
+        ads_api_errors_total{endpoint, code}: Local API 返回的错误(HTTP 200 但 code 不为 0),code 为响应中的 code。
+        ads_coalesced_total{endpoint}: 合并到其他线程进行中请求的只读查询次数。
+    """
+
+    def increment(self, name, value=1, labels=None):
+        """
+        增加计数器。
+
+        Args:
+            name (str): 指标名称。
+            value (float, optional): 增加的值。默认为 1。
+            labels (dict, optional): 标签。默认为 None。
+        """
+
+    def observe(self, name, value, labels=None):
+        """
+        向直方图记录一个观测值。
+
+        Args:
+            name (str): 指标名称。
+            value (float): 观测值,耗时类指标的单位为秒。
+            labels (dict, optional): 标签。默认为 None。
+        """
+
+
+class InMemoryMetrics(MetricsSink):
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        初始化在内存中汇总的指标接收器,可以导出为 Prometheus 文本格式。
+
+        Args:
+            buckets (tuple, optional): 直方图的桶上界。默认为 DEFAULT_BUCKETS。
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}  # (名称, 标签) -> 值
+        self._histograms = {}  # (名称, 标签) -> [各桶计数, 总和, 次数]
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        """
+        获取当前所有指标的副本。
+
+        Returns:
+            dict: {"counters": {(名称, 标签): 值}, "histograms": {(名称, 标签): {"buckets", "sum", "count"}}},
+                标签为排好序的 (键, 值) 元组。
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {key: {"buckets": list(counts), "sum": total, "count": count}
+                               for key, (counts, total, count) in self._histograms.items()},
+            }
+
+    def reset(self):
+        """
+        清空所有指标。
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        """
+        把所有指标导出为 Prometheus 文本格式。
+
+        Returns:
+            str: Prometheus 文本格式的指标。
+        """
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_prometheus_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(snapshot["histograms"].items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', repr(float(bound))),))} {cumulative}")
+            lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_prometheus_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_prometheus_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_labels(labels):
+    """
+    把标签格式化为 Prometheus 文本格式,例如 {endpoint="browser/start"}。
+
+    Args:
+        labels (tuple): (键, 值) 元组。
+
+    Returns:
+        str: 格式化后的标签,没有标签时为空字符串。
+    """
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def start_metrics_server(metrics, port=9464, host="127.0.0.1"):
+    """
+    在后台线程中启动 HTTP 服务器,以 Prometheus 文本格式提供 metrics 的指标。
+
+    Args:
+        metrics (InMemoryMetrics): 要导出的指标。
+        port (int, optional): 监听端口。默认为 9464。
+        host (str, optional): 监听地址。默认为 "127.0.0.1"。
+
+    Returns:
+        ThreadingHTTPServer: 已启动的服务器,调用 shutdown() 停止。
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _run_hooks(hooks, *args):
+    """
+    依次调用钩子,钩子抛出的异常只记录日志,不影响请求本身。
+
+    Args:
+        hooks (list): 钩子函数。
+        *args: 传给钩子的参数。
+    """
+    for hook in hooks:
+        try:
+            hook(*args)
+        except Exception:
+            logger.exception("钩子 %r 执行失败", hook)
+
+
+def _stream_results(fn, items, max_workers, wait=False):
+    """
+    用线程池对每个 item 调用 fn,每完成一个就产出一个结果。
+
+    调用方提前结束遍历(关闭生成器)时取消尚未开始的调用。在 for 循环中使用时应包在 closing 中,
+    保证提前结束时立即取消,而不是等到生成器被回收。
+
+    Args:
+        fn (callable): fn(item),返回值作为该 item 的结果。
+        items (iterable): 要处理的对象,在产出第一个结果前全部提交。
+        max_workers (int): 线程数。
+        wait (bool, optional): 结束时是否等待进行中的调用完成。默认为 False。
+
+    Yields:
+        tuple: (item, 结果),fn 抛出异常时结果为异常对象。
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = e
+            yield futures[future], result
+    finally:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _stop_launched_on_exit(ads_ref):
+    """
+    进程退出时停止 ADS 实例启动且尚未停止的所有浏览器,由 stop_on_exit 注册。
+
+    Args:
+        ads_ref (weakref.ref): ADS 实例的弱引用。
+    """
+    ads = ads_ref()
+    if ads is None:
+        return
+    user_ids = ads.launched
+    if user_ids:
+        logger.info("进程退出,停止 %d 个浏览器实例", len(user_ids))
+        # atexit 回调执行时线程池已不再接受新任务,只能在当前线程中依次停止;默认限流下并发停止也不会更快
+        ads.stop_all(user_ids, concurrency=1)
+
 
 class ADS:
-    def __init__(self, matrix):
+    def __init__(self, matrix, group_id=None, rate_limits=None, retry_policy=None, pool_size=None, timeout=DEFAULT_TIMEOUT,
+                 cache_ttls=None, cache_size=1024, concurrency=None, metrics=None, hooks=None, stop_on_exit=False,
+                 profile_store=None, journal=None, max_live_browsers=None, live_timeout=60):
+        """
+        初始化 ADS 类。
+
+        构造时不发起任何网络请求,默认组 ID 在第一次用到时才获取。
+
+        Args:
+            matrix (str): 矩阵 API 的 URL。
+            group_id (str, optional): 默认组 ID。默认为 None,第一次创建浏览器用户时通过 get_or_create_groupid 获取。
+            rate_limits (dict, optional): 按端点的限流配置,格式见 DEFAULT_RATE_LIMITS。默认为 None,使用默认配置。
+            retry_policy (RetryPolicy, optional): 重试策略。默认为 None,使用 RetryPolicy()。
+            pool_size (int, optional): 连接池中保持的长连接数量。默认为 None,取各端点类别并发上限之和,
+                保证同时进行中的请求都能复用长连接。
+            timeout (float or tuple, optional): 默认的 (连接超时, 读取超时) 秒数。默认为 DEFAULT_TIMEOUT。
+            cache_ttls (dict, optional): 各类资源的缓存有效期,会覆盖 DEFAULT_CACHE_TTLS 中的对应项。默认为 None。
+            cache_size (int, optional): 缓存的最大条目数。默认为 1024。
+            concurrency (dict, optional): 各端点类别同时进行中的请求数上限,会覆盖 DEFAULT_CONCURRENCY 中的对应项。默认为 None。
+            metrics (MetricsSink, optional): 指标接收器,例如 InMemoryMetrics()。默认为 None,不记录指标。
+            hooks (dict, optional): {"request": [callable], "response": [callable]}。请求前调用
+                hook(method, url, params, payload),请求后调用 hook(method, url, response, elapsed, error),
+                发生请求异常时 response 为 None。默认为 None。
+            stop_on_exit (bool, optional): 进程正常退出时是否停止本实例启动且尚未停止的所有浏览器;
+                在此之前调用 close 时改为在 close 中停止。默认为 False。
+            profile_store (ProfileStore or str, optional): 本地浏览器用户索引,传入路径时自动打开,close 时关闭。
+                默认为 None,不使用。
+            journal (Journal or str, optional): 生命周期操作的预写日志,传入路径时自动打开,close 时关闭。
+                默认为 None,不记录。
+            max_live_browsers (int, optional): 本实例同时存活(启动中和已启动)的浏览器数量上限,对 start_browser、
+                run_fleet、BrowserPool 等所有启动方式共同生效;达到上限时启动会等待其他浏览器停止。默认为 None,不限制。
+            live_timeout (float, optional): 达到 max_live_browsers 时启动最多等待的秒数,超时后启动失败;
+                0 表示不等待,None 表示一直等待。默认为 60。
+        """
+        self.matrix = matrix
+        # 不再使用全局锁:按端点类别限制并发,按浏览器用户保证同一用户的生命周期操作有序
+        limits = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items()}
+        self._profile_locks = ProfileLocks()
+        self.rate_limiter = RateLimiter(rate_limits)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout
+        self.session = requests.Session()  # 复用 keep-alive 连接,避免每次调用都重新建立 TCP 连接
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=sum(limits.values()) if pool_size is None else pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-type": "application/json"})
+        self._local_active_supported = True  # 旧版本的 AdsPower 没有 browser/local-active
+        self._local_active_failures = 0  # browser/local-active 连续暂时失败的次数
+        self._local_active_retry_at = 0.0  # 暂时失败后,在此时刻(time.monotonic)之前不再查询 browser/local-active
+        self.cache = TTLCache(cache_size)
+        self.cache_ttls = dict(DEFAULT_CACHE_TTLS, **(cache_ttls or {}))
+        self._flight = SingleFlight()  # 合并并发的相同只读查询
+        self._group_id = group_id
+        self._group_lock = threading.Lock()
+        self.metrics = metrics or MetricsSink()
+        self.hooks = {"request": list((hooks or {}).get("request", [])),
+                      "response": list((hooks or {}).get("response", []))}
+        self._launched = set()  # 本实例启动且尚未停止的浏览器用户
+        self._launched_lock = threading.Lock()
+        self.max_live_browsers = max_live_browsers
+        self.live_timeout = live_timeout
+        self._live_changed = threading.Condition(self._launched_lock)  # _launched 或 _live_reserved 减少时通知
+        self._live_reserved = 0  # 正在启动、已占用存活名额的浏览器数量
+        self._exit_hook = None
+        if stop_on_exit:
+            # 弱引用,不阻止实例被回收;每个实例各自的 partial,close 时只注销自己的回调
+            self._exit_hook = partial(_stop_launched_on_exit, weakref.ref(self))
+            atexit.register(self._exit_hook)
+        self._owns_store = isinstance(profile_store, str)
+        self.profile_store = ProfileStore(profile_store) if self._owns_store else profile_store
+        self.tracker = None  # 由 track 启动的 ActiveTracker
+        self._owns_journal = isinstance(journal, str)
+        self.journal = Journal(journal) if self._owns_journal else journal
+
+    @property
+    def launched(self):
+        """
+        set: 本实例启动且尚未停止的浏览器用户 ID 的副本。
+        """
+        with self._launched_lock:
+            return set(self._launched)
+
+    def _reserve_live(self, user_id):
+        """
+        等待存活的浏览器数量低于 max_live_browsers,再为 user_id 占用一个名额。最多等待 live_timeout 秒。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            bool or None: 是否占用了名额。没有上限或该浏览器已由本实例启动时不占用;等待超时返回 None。
+        """
+        if self.max_live_browsers is None:
+            return False
+        with self._live_changed:
+            if user_id in self._launched:
+                return False
+            if not self._live_changed.wait_for(
+                    lambda: len(self._launched) + self._live_reserved < self.max_live_browsers, self.live_timeout):
+                logger.warning("存活的浏览器已达到上限 %d,%s 秒内没有空出名额,不启动浏览器实例 %s",
+                               self.max_live_browsers, self.live_timeout, user_id)
+                return None
+            self._live_reserved += 1
+            return True
+
+    def _forget_launched(self, user_ids):
+        """
+        把已停止的浏览器从本实例启动的浏览器中移除,并唤醒等待存活名额的启动。
+
+        Args:
+            user_ids (iterable): 已停止的浏览器用户 ID。
+        """
+        with self._live_changed:
+            self._launched.difference_update(user_ids)
+            self._live_changed.notify_all()
+
+    @property
+    def group_id(self):
+        """
+        str: 默认组 ID。第一次访问时调用 get_or_create_groupid 获取并记住结果,获取失败("0")时下次访问会重试。
+        """
+        if self._group_id is None:
+            with self._group_lock:
+                if self._group_id is None:
+                    group_id = self.get_or_create_groupid()
+                    if group_id != "0":
+                        self._group_id = group_id
+                    return group_id
+        return self._group_id
+
+    @group_id.setter
+    def group_id(self, group_id):
+        self._group_id = group_id
+
+    def invalidate_cache(self, resource=None, user_id=None):
+        """
+        使缓存失效。本实例的 create、del_browser 等写操作会自动调用。
+
+        Args:
+            resource (str, optional): "groups"、"profiles"、"info" 或 "active"。默认为 None,清空全部缓存。
+            user_id (str, optional): resource 为 "info" 时只使该用户的信息失效。默认为 None。
+        """
+        if resource == "info" and user_id is not None:
+            self.cache.pop(("info", user_id))
+        else:
+            self.cache.clear(resource)
+
+    def close(self):
+        """
+        停止活动浏览器跟踪器,关闭连接池中的所有连接,以及由本实例打开的本地浏览器用户索引和预写日志。
+
+        设置了 stop_on_exit 时,先停止本实例启动且尚未停止的浏览器,并注销进程退出时的回调,
+        避免回调在连接池和日志关闭后才执行。
+        """
+        if self._exit_hook is not None:
+            atexit.unregister(self._exit_hook)
+            self._exit_hook = None
+            user_ids = self.launched
+            if user_ids:
+                logger.info("关闭 ADS,停止 %d 个浏览器实例", len(user_ids))
+                self.stop_all(user_ids)
+        if self.tracker is not None:
+            self.tracker.close()
+        self.session.close()
+        if self._owns_store:
+            self.profile_store.close()
+        if self._owns_journal:
+            self.journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _request(self, method, endpoint, params=None, payload=None, timeout=None, version="v1"):
+        """
+        向 Local API 发送一次请求。
+
+        先按配额等待,再占用该端点类别的并发名额发送请求,只读查询不会排在启动浏览器后面。
+
+        Args:
+            method (str): "GET" 或 "POST"。
+            endpoint (str): 端点路径,可以带查询字符串,例如 "browser/active?user_id=xxx"。
+            params (dict, optional): 查询参数。默认为 None。
+            payload (dict, optional): POST 的 JSON 数据。默认为 None。
+            timeout (float or tuple, optional): 本次请求的 (连接超时, 读取超时) 秒数。默认为 None,使用 self.timeout。
+            version (str, optional): Local API 版本。默认为 "v1"。
+
+        Returns:
+            requests.Response: 响应对象。
+        """
+        path = endpoint.split("?", 1)[0]
+        wait = self.rate_limiter.reserve(path)
+        if wait > 0:
+            self.metrics.observe("ads_rate_limit_wait_seconds", wait, {"endpoint": path})
+            time.sleep(wait)
+        url = f"{self.matrix}/api/{version}/{endpoint}"
+        if timeout is None:
+            timeout = self.timeout
+        _run_hooks(self.hooks["request"], method, url, params, payload)
+
+        slot_class = ENDPOINT_CLASSES.get(path, "listing")
+        waited = time.perf_counter()
+        with self._slots[slot_class]:
+            started = time.perf_counter()
+            self.metrics.observe("ads_lock_wait_seconds", started - waited, {"lock": slot_class})
+            try:
+                if method == "POST":
+                    response = self.session.post(url, data=_encode_payload(payload) if payload is not None else None,
+                                                 timeout=timeout)
+                else:
+                    response = self.session.get(url, params=params, timeout=timeout)
+            except requests.exceptions.RequestException as e:
+                self._record_response(method, path, url, None, time.perf_counter() - started, e)
+                raise
+        self._record_response(method, path, url, response, time.perf_counter() - started, None)
+        return response
+
+    def _record_response(self, method, path, url, response, elapsed, error):
+        """
+        记录一次请求的指标并调用 response 钩子。
+
+        Args:
+            method (str): "GET" 或 "POST"。
+            path (str): 不带查询字符串的端点路径。
+            url (str): 完整的请求 URL。
+            response (requests.Response): 响应对象,发生请求异常时为 None。
+            elapsed (float): 请求耗时秒数。
+            error (Exception): 请求异常,没有异常时为 None。
+        """
+        status = str(response.status_code) if response is not None else type(error).__name__
+        self.metrics.increment("ads_requests_total", labels={"endpoint": path, "status": status})
+        self.metrics.observe("ads_request_seconds", elapsed, {"endpoint": path})
+        logger.debug("%s %s -> %s (%.3fs)", method, url, status, elapsed)
+        _run_hooks(self.hooks["response"], method, url, response, elapsed, error)
+
+    def _read(self, endpoint, params=None):
+        """
+        发送一次只读 GET 查询并解析 JSON。并发的相同查询(端点和参数都相同)合并为一次请求,共享同一个结果。
+
+        Args:
+            endpoint (str): 端点路径,可以带查询字符串。
+            params (dict, optional): 查询参数。默认为 None。
+
+        Returns:
+            dict: 响应数据。多个调用方共享同一个对象,不要修改。
+
+        Raises:
+            ValueError: 响应不是 JSON。
+            requests.exceptions.RequestException: 请求异常。
+        """
+        key = ("GET", endpoint, tuple(sorted(params.items())) if params else ())
+        data, shared = self._flight.do(key, lambda: self._request("GET", endpoint, params=params).json())
+        if shared:
+            self.metrics.increment("ads_coalesced_total", labels={"endpoint": endpoint.split("?", 1)[0]})
+        return data
+
+    @contextmanager
+    def _journaled(self, op, **fields):
+        """
+        在 journal 中记录一个生命周期操作的意图和结果。调用方把结果写入产出的 dict:"ok" 表示是否成功,其余项作为结果数据。
+
+        Args:
+            op (str): 操作类型。
+            **fields: 恢复操作所需的数据。
+        """
+        if self.journal is None:
+            yield {}
+            return
+        if self.journal.closed:
+            # 调用方已关闭 journal 时仍执行操作(例如退出时停止浏览器),只是不再记录
+            logger.warning("journal 已关闭,%s 操作不会被记录", op)
+            yield {}
+            return
+        op_id = self.journal.begin(op, **fields)
+        outcome = {"ok": False}
+        try:
+            yield outcome
+        except BaseException as e:
+            outcome["error"] = repr(e)
+            raise
+        finally:
+            self.journal.finish(op_id, outcome.pop("ok"), **outcome)
+
+    @contextmanager
+    def _hold_profile(self, user_id):
+        """
+        持有指定浏览器用户的锁,并记录等待时间。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+        """
+        waited = time.perf_counter()
+        with self._profile_locks.hold(user_id):
+            self.metrics.observe("ads_lock_wait_seconds", time.perf_counter() - waited, {"lock": "profile"})
+            yield
+
+    def _connect_timeout(self):
+        """
+        返回默认超时中的连接超时部分。
+
+        Returns:
+            float: 连接超时秒数。
+        """
+        return self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+
+    def _with_retry(self, operation, action, attempt_fn):
+        """
+        按 self.retry_policy 重复执行 attempt_fn,直到成功、遇到不可重试的错误、次数用完或超过总时长。
+
+        Args:
+            operation (str): 操作名称,用作指标标签,例如 "start_browser"。
+            action (str): 操作描述,用于日志,例如 "启动浏览器实例 xxx"。
+            attempt_fn (callable): 执行一次尝试,返回 (是否成功, 结果, 响应数据)。
+
+        Returns:
+            成功时为 attempt_fn 返回的结果,否则为 None。
+        """
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.deadline
+        for attempt in range(policy.max_attempts):
+            try:
+                ok, result, data = attempt_fn()
+                if ok:
+                    self.metrics.increment("ads_operations_total", labels={"operation": operation, "result": "ok"})
+                    return result
+                kind = policy.classify(data=data)
+                self.metrics.increment("ads_api_errors_total", labels={
+                    "endpoint": OPERATION_ENDPOINTS.get(operation, operation), "code": str(data.get("code"))})
+                logger.warning("第 %d 次%s 失败: %s", attempt + 1, action, data.get("msg"))
+            except (requests.exceptions.RequestException, ValueError) as e:
+                kind = policy.classify(error=e)
+                logger.warning("第 %d 次%s 时发生请求异常: %s", attempt + 1, action, e)
+            self.metrics.increment("ads_failures_total", labels={"operation": operation, "kind": kind})
+
+            if kind == FATAL:
+                logger.error("%s 遇到不可重试的错误,不再重试", action)
+                break
+            delay = policy.delay(attempt, kind)
+            if attempt + 1 >= policy.max_attempts or time.monotonic() + delay > deadline:
+                logger.error("%s 失败,已尝试 %d 次", action, attempt + 1)
+                break
+            self.metrics.increment("ads_retries_total", labels={"operation": operation})
+            time.sleep(delay)
+
+        self.metrics.increment("ads_operations_total", labels={"operation": operation, "result": "failed"})
+        return None
+
+    def start_browser(self, user_id, open_tabs=0, ip_tab=1, new_first_tab=0, launch_args="", headless=0, disable_password_filling=0,
+                    clear_cache_after_closing=0, enable_password_saving=0, options=None):
+        """
+        启动一个新的浏览器实例。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+            open_tabs (int, optional): 是否打开平台和历史页面,0 表示打开(默认),1 表示不打开。默认为 0。
+            ip_tab (int, optional): 是否打开 IP 检测页,0 表示不打开,1 表示打开(默认)。默认为 1。
+            new_first_tab (int, optional): 是否使用新版 IP 检测页,1 表示新版,0 表示旧版(默认)。默认为 0。
+            launch_args (str | list, optional): 启动浏览器时传递的额外参数,为字符串列表或 JSON 数组字符串。默认为空字符串。
+            headless (int, optional): 是否以无头模式启动浏览器,0 表示不启用(默认),1 表示启用。默认为 0。
+            disable_password_filling (int, optional): 是否禁用密码自动填充功能,0 表示不禁用(默认),1 表示禁用。默认为 0。
+            clear_cache_after_closing (int, optional): 是否在关闭浏览器后清除缓存,0 表示不清除(默认),1 表示清除。默认为 0。
+            enable_password_saving (int, optional): 是否允许保存密码,0 表示不允许(默认),1 表示允许。默认为 0。
+            options (LaunchOptions, optional): 预先构造的启动参数,指定时忽略上面的各个启动参数。默认为 None。
+
+        Returns:
+            tuple: 包含 WebDriver 路径和调试端口号的元组。如果启动失败,则返回 (None, None)。
+
+        Raises:
+            ValueError: 启动参数不合法。
+        """
+        session = self.start_session(user_id, open_tabs, ip_tab, new_first_tab, launch_args, headless,
+                                     disable_password_filling, clear_cache_after_closing, enable_password_saving, options)
+        return (session.webdriver, session.debug_port) if session is not None else (None, None)
+
+    def start_session(self, user_id, open_tabs=0, ip_tab=1, new_first_tab=0, launch_args="", headless=0, disable_password_filling=0,
+                      clear_cache_after_closing=0, enable_password_saving=0, options=None):
+        """
+        启动一个新的浏览器实例,参数含义见 start_browser。
+
+        Returns:
+            BrowserSession: 已启动的浏览器实例,如果启动失败则返回 None。
+
+        Raises:
+            ValueError: 启动参数不合法。
+        """
+        if options is None:
+            options = _launch_options(open_tabs, ip_tab, new_first_tab,
+                                      tuple(launch_args) if isinstance(launch_args, list) else launch_args, headless,
+                                      disable_password_filling, clear_cache_after_closing, enable_password_saving)
+        endpoint = options.endpoint(user_id)
+
+        def attempt():
+            data = self._request("GET", endpoint).json()
+            logger.debug("启动浏览器实例 %s 的响应: %s", user_id, data)
+            if data["code"] == 0:
+                return True, BrowserSession.from_api(user_id, data["data"]), data
+            return False, None, data
+
+        # 先占用存活名额再取浏览器用户的锁,等待名额时不阻塞同一浏览器用户的停止
+        reserved = self._reserve_live(user_id)
+        if reserved is None:
+            self.metrics.increment("ads_operations_total", labels={"operation": "start_browser", "result": "failed"})
+            return None
+        session = None
+        try:
+            # 同一浏览器用户的生命周期操作按顺序执行
+            with self._hold_profile(user_id), self._journaled("start", user_ids=[user_id]) as outcome:
+                session = self._with_retry("start_browser", f"启动浏览器实例 {user_id}", attempt)
+                with self._live_changed:
+                    if session is not None:
+                        self._launched.add(user_id)
+                outcome["ok"] = session is not None
+                if session is not None:
+                    self.cache.pop(("active",))
+                    if self.profile_store is not None:
+                        self.profile_store.set_active([user_id], True)
+                    if self.tracker is not None:
+                        self.tracker.note_started(session)
+        finally:
+            if reserved:
+                with self._live_changed:
+                    self._live_reserved -= 1
+                    self._live_changed.notify_all()
+        return session
+
+    def start_browsers(self, user_ids, options=None, concurrency=4):
+        """
+        用同一组启动参数批量启动浏览器实例,每启动完一个就产出一个结果。
+
+        查询字符串只编码一次,各浏览器用户之间只替换 user_id;实际并发同时受生命周期类端点的并发上限约束。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            options (LaunchOptions, optional): 启动参数。默认为 None,使用 LaunchOptions()。
+            concurrency (int, optional): 同时进行中的启动请求数。默认为 4。
+
+        Yields:
+            tuple: (user_id, 结果),结果为 BrowserSession,失败时为异常对象。
+        """
+        options = options or _launch_options()
+
+        def start(user_id):
+            session = self.start_session(user_id, options=options)
+            return session if session is not None else ADSError(f"启动浏览器实例 {user_id} 失败")
+
+        yield from _stream_results(start, dict.fromkeys(user_ids), concurrency)
+
+    def stop_browser(self, user_id):
+        """
+        停止指定用户 ID 的浏览器实例。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            bool: 如果停止成功,返回 True,否则返回 False。
+        """
+        def attempt():
+            data = self._request("GET", f"browser/stop?user_id={user_id}").json()
+            return data["code"] == 0, True, data
+
+        stopping = self.tracker.stopping(user_id) if self.tracker is not None else nullcontext()
+        with self._hold_profile(user_id), stopping, self._journaled("stop", user_ids=[user_id]) as outcome:
+            if self._with_retry("stop_browser", f"停止浏览器实例 {user_id}", attempt):
+                outcome["ok"] = True
+                logger.info("浏览器实例 %s 停止成功", user_id)
+                self.cache.pop(("active",))
+                self._forget_launched([user_id])
+                if self.profile_store is not None:
+                    self.profile_store.set_active([user_id], False)
+                if self.tracker is not None:
+                    self.tracker.note_stopped(user_id)
+                return True
+        return False
+
+    def check_start_status(self, user_id, timeout=15):
+        """
+        检查指定用户 ID 的浏览器实例是否处于活动状态。
+
+        浏览器一旦处于活动状态立即返回,否则按 PollStrategy 自适应轮询直到超时。已启动 ActiveTracker 时,
+        表中已有的浏览器直接从内存返回,不发送请求。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+            timeout (float, optional): 最长等待秒数。默认为 15。
+
+        Returns:
+            bool: 如果浏览器实例处于活动状态,返回 True,否则返回 False。
+        """
+        if self.tracker is not None and self.tracker.is_active(user_id):
+            return True
+        return self.wait_until_active([user_id], timeout=timeout)[user_id] is not None
+
+    def track(self, interval=1.0):
+        """
+        启动后台活动浏览器跟踪器。已启动时直接返回已有的跟踪器。
+
+        Args:
+            interval (float, optional): 扫描间隔秒数。默认为 1.0。
+
+        Returns:
+            ActiveTracker: 跟踪器,可以用 get、is_active 查询状态,用 subscribe 订阅 start/stop/crash 事件。
+        """
+        if self.tracker is None:
+            self.tracker = ActiveTracker(self, interval).start()
+        return self.tracker
+
+    def _local_active(self, fresh=False):
+        """
+        用一次 browser/local-active 查询本机所有已打开的浏览器。结果按 "active" 的有效期缓存,并发的调用共用一次查询。
+
+        只有 HTTP 状态码表明接口不存在(LOCAL_ACTIVE_UNSUPPORTED_STATUS)时,本实例才不再使用该接口,由调用方回退为
+        逐个查询。其他失败(限流、code 不为 0、无法解析的响应)都是暂时的:按 retry_policy 退避暂停查询并抛出 ADSError,
+        由调用方稍后重试,不在 Local API 限流时回退为成倍的逐个查询。
+
+        Args:
+            fresh (bool, optional): 是否跳过缓存和进行中的查询,发送一次新的请求。默认为 False。
+
+        Returns:
+            dict: {user_id: 活动浏览器信息};当前 AdsPower 版本没有该接口时为 None。
+
+        Raises:
+            ADSError: 查询暂时失败,或仍在上次失败后的退避时间内。
+            requests.exceptions.RequestException: 请求失败。
+        """
+        if not self._local_active_supported:
+            return None
+        active = None if fresh else self.cache.get(("active",))
+        if active is not None:
+            return active
+        wait = self._local_active_retry_at - time.monotonic()
+        if wait > 0:
+            raise ADSError(f"browser/local-active 暂时不可用,{wait:.1f} 秒后重试")
+
+        def fetch():
+            response = self._request("GET", "browser/local-active")
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+
+        if fresh:
+            status, data = fetch()
+        else:
+            (status, data), shared = self._flight.do(("GET", "browser/local-active", "status"), fetch)
+            if shared:
+                self.metrics.increment("ads_coalesced_total", labels={"endpoint": "browser/local-active"})
+        if data is not None and data.get("code") == 0:
+            self._local_active_failures = 0
+            active = {item["user_id"]: item for item in data["data"]["list"]}
+            self.cache.set(("active",), active, self.cache_ttls["active"])
+            return active
+        if status in LOCAL_ACTIVE_UNSUPPORTED_STATUS:
+            logger.info("当前 AdsPower 版本没有 browser/local-active 接口(HTTP %s),改为逐个查询 browser/active", status)
+            self._local_active_supported = False
+            return None
+        kind = self.retry_policy.classify(data) if data is not None else RETRYABLE
+        delay = min(LOCAL_ACTIVE_MAX_BACKOFF, self.retry_policy.delay(self._local_active_failures, kind))
+        self._local_active_failures += 1
+        self._local_active_retry_at = time.monotonic() + delay
+        reason = data.get("msg") if data is not None else f"HTTP {status} 的响应无法解析"
+        logger.warning("browser/local-active 查询失败: %s,%.1f 秒内不再查询", reason, delay)
+        raise ADSError(f"browser/local-active 查询失败: {reason}")
+
+    def _active_sessions(self, user_ids):
+        """
+        查询 user_ids 中处于活动状态的浏览器实例。
+
+        用一次 browser/local-active 查询本机所有已打开的浏览器,并发检查不同浏览器用户的线程共用同一次查询;
+        当前 AdsPower 版本没有该接口时回退为逐个查询 browser/active。
+
+        Args:
+            user_ids (list): 浏览器用户 ID 列表。
+
+        Returns:
+            dict: {user_id: 活动浏览器信息},只包含处于活动状态的 ID。
+
+        Raises:
+            ADSError: browser/local-active 暂时失败,见 _local_active。
+            requests.exceptions.RequestException: 请求失败。
+        """
+        local_active = self._local_active()
+        if local_active is not None:
+            return {user_id: local_active[user_id] for user_id in user_ids if user_id in local_active}
+
+        active = {}
+        for user_id in user_ids:
+            data = self._read(f"browser/active?user_id={user_id}")
+            if data["code"] == 0 and data["data"]["status"] == "Active":
+                active[user_id] = data["data"]
+        return active
+
+    def iter_until_active(self, user_ids, timeout=30, poll_strategy=None, probe_debug_port=False):
+        """
+        等待多个浏览器实例进入活动状态,每就绪一个就立即产出一个。
+
+        第一次检查不等待;之后所有未就绪的 ID 共用一次查询,按 poll_strategy 退避。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            timeout (float, optional): 最长等待秒数。默认为 30。
+            poll_strategy (PollStrategy, optional): 轮询策略。默认为 None,使用 PollStrategy()。
+            probe_debug_port (bool, optional): 是否在 Local API 报告活动后再直接连接调试端口确认。默认为 False。
+
+        Yields:
+            tuple: (user_id, 信息),信息为包含 "webdriver" 和 "debug_port" 的 dict,超时未就绪时为 None。
+        """
+        poll_strategy = poll_strategy or PollStrategy()
+        deadline = time.monotonic() + timeout
+        pending = list(dict.fromkeys(user_ids))
+        attempt = 0
+
+        while pending:
+            try:
+                active = self._active_sessions(pending)
+            except (ADSError, requests.exceptions.RequestException) as e:
+                logger.warning("第 %d 次检查失败: %s", attempt + 1, e)
+                active = {}
+
+            for user_id in list(pending):
+                item = active.get(user_id)
+                if item is None:
+                    continue
+                debug_port = item.get("ws", {}).get("selenium")
+                if probe_debug_port and not (debug_port and _probe_debug_port(debug_port)):
+                    continue
+                pending.remove(user_id)
+                yield user_id, {"webdriver": item.get("webdriver"), "debug_port": debug_port}
+
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            time.sleep(min(remaining, poll_strategy.delay(attempt)))
+            attempt += 1
+
+        for user_id in pending:
+            logger.warning("浏览器实例 %s 在 %s 秒内未处于活动状态", user_id, timeout)
+            yield user_id, None
+
+    def wait_until_active(self, user_ids, timeout=30, poll_strategy=None, probe_debug_port=False):
+        """
+        等待多个浏览器实例进入活动状态,参数含义见 iter_until_active。
+
+        Returns:
+            dict: {user_id: 信息},信息为包含 "webdriver" 和 "debug_port" 的 dict,超时未就绪时为 None。
+        """
+        return dict(self.iter_until_active(user_ids, timeout, poll_strategy, probe_debug_port))
+
+    def run_fleet(self, user_ids, job_fn, max_concurrent=4, per_profile_timeout=None, max_live=None, ready_timeout=30,
+                  clear_cache=False, start_kwargs=None):
+        """
+        在多个浏览器用户上运行同一个任务:启动 → 等待就绪 → job_fn → 停止,每完成一个就产出一个结果。
+
+        启动、任务和停止按流水线进行:任务结束后停止交给单独的线程,工作线程立即启动下一个浏览器用户,
+        停止与后续的启动可以重叠。全部结束(包括调用方提前结束遍历)时,所有已启动的浏览器都已停止。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            job_fn (callable): job_fn(user_id, webdriver, debug_port),返回值作为该浏览器用户的结果。
+            max_concurrent (int, optional): 同时运行的任务数量。默认为 4。
+            per_profile_timeout (float, optional): 从浏览器启动成功到任务结束的最长秒数,超时后停止浏览器,
+                结果为 TimeoutError。job_fn 应在浏览器被停止后尽快退出。默认为 None,不限制。
+            max_live (int, optional): 本次调用同时存活(启动中、运行任务和停止中)的浏览器数量上限。
+                默认为 None,即 max_concurrent 的两倍,且不超过 ADS 的 max_live_browsers。整个实例的上限由
+                max_live_browsers 控制,与其他 run_fleet 调用和 BrowserPool 共同计算。
+            ready_timeout (float, optional): 启动后等待浏览器进入活动状态的最长秒数。默认为 30。
+            clear_cache (bool, optional): 是否在关闭浏览器后清除缓存。默认为 False。
+            start_kwargs (dict, optional): 传给 start_browser 的其他参数。默认为 None。
+
+        Yields:
+            tuple: (user_id, 结果),结果为 job_fn 的返回值,失败时为异常对象。
+        """
+        start_kwargs = dict(start_kwargs or {})
+        if clear_cache:
+            start_kwargs["clear_cache_after_closing"] = 1
+        max_live = max_live or max_concurrent * 2
+        if self.max_live_browsers is not None:
+            max_live = min(max_live, self.max_live_browsers)  # 不在实例的名额上等待 live_timeout 后失败
+        live = threading.BoundedSemaphore(max_live)
+        stop_executor = ThreadPoolExecutor(max_workers=max_concurrent)
+
+        def stop(user_id):
+            try:
+                self.stop_browser(user_id)
+            finally:
+                live.release()
+
+        def run(user_id):
+            live.acquire()
+            started = False
+            stopped = threading.Event()  # 任务超时后已由计时器停止
+            try:
+                webdriver, debug_port = self.start_browser(user_id, **start_kwargs)
+                if webdriver is None:
+                    return ADSError(f"启动浏览器实例 {user_id} 失败")
+                started = True
+
+                timed_out = threading.Event()
+                timer = None
+                if per_profile_timeout is not None:
+                    def expire():
+                        timed_out.set()
+                        logger.warning("浏览器实例 %s 的任务超过 %s 秒,停止浏览器", user_id, per_profile_timeout)
+                        if self.stop_browser(user_id):
+                            stopped.set()
+
+                    timer = threading.Timer(per_profile_timeout, expire)
+                    timer.daemon = True
+                    timer.start()
+                try:
+                    if self.wait_until_active([user_id], timeout=ready_timeout)[user_id] is None:
+                        result = ADSError(f"浏览器实例 {user_id} 在 {ready_timeout} 秒内未处于活动状态")
+                    else:
+                        result = job_fn(user_id, webdriver, debug_port)
+                except Exception as e:
+                    logger.warning("浏览器实例 %s 的任务失败: %s", user_id, e)
+                    result = e
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                        timer.join()  # 等待正在进行的超时停止结束,再决定是否还需要停止
+                if timed_out.is_set():
+                    result = TimeoutError(f"浏览器实例 {user_id} 的任务超过 {per_profile_timeout} 秒")
+                return result
+            except Exception as e:
+                return e
+            finally:
+                if started and not stopped.is_set():
+                    stop_executor.submit(stop, user_id)  # 停止与下一个浏览器用户的启动重叠进行
+                else:
+                    live.release()
+
+        try:
+            # 等待进行中的任务结束,它们提交的停止都在 stop_executor 关闭前完成提交
+            with closing(_stream_results(run, dict.fromkeys(user_ids), max_concurrent, wait=True)) as results:
+                for user_id, result in results:
+                    outcome = "failed" if isinstance(result, Exception) else "ok"
+                    self.metrics.increment("ads_operations_total", labels={"operation": "run_fleet", "result": outcome})
+                    yield user_id, result
+        finally:
+            stop_executor.shutdown(wait=True)  # 等待已启动的浏览器全部停止
+
+    def stop_all(self, user_ids=None, concurrency=8, timeout=30, poll_strategy=None):
+        """
+        并发停止多个浏览器实例,再批量确认它们都已不处于活动状态。
+
+        停止请求仍受 browser/stop 的限流配额和 lifecycle 并发名额约束;确认时所有 ID 共用一次 browser/local-active 查询。
+
+        Args:
+            user_ids (iterable, optional): 要停止的浏览器用户 ID。默认为 None,停止本机所有已打开的浏览器;
+                AdsPower 版本不支持 browser/local-active 时只停止本实例启动的浏览器。
+            concurrency (int, optional): 同时进行中的停止请求数,1 表示在当前线程中依次停止。默认为 8。
+            timeout (float, optional): 停止后等待浏览器全部关闭的最长秒数。默认为 30。
+            poll_strategy (PollStrategy, optional): 确认时的轮询策略。默认为 None,使用 PollStrategy()。
+
+        Returns:
+            dict: {user_id: bool},True 表示已确认停止。
+        """
+        if user_ids is None:
+            try:
+                local_active = self._local_active()
+            except (ADSError, requests.exceptions.RequestException) as e:
+                logger.warning("查询本机已打开的浏览器失败: %s", e)
+                local_active = None
+            if local_active is None:
+                logger.warning("无法获取本机已打开的浏览器,只停止本实例启动的浏览器")
+                user_ids = self.launched
+            else:
+                user_ids = local_active
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(self.stop_browser, user_ids))
+        else:
+            for user_id in user_ids:
+                self.stop_browser(user_id)
+
+        # 无论 stop_browser 是否报错都以实际状态为准,浏览器可能已经关闭
+        self.cache.pop(("active",))
+        poll_strategy = poll_strategy or PollStrategy()
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            try:
+                still_active = set(self._active_sessions(user_ids))
+            except (ADSError, requests.exceptions.RequestException) as e:
+                logger.warning("第 %d 次确认浏览器已停止时查询失败: %s", attempt + 1, e)
+                still_active = set(user_ids)
+            remaining = deadline - time.monotonic()
+            if not still_active or remaining <= 0:
+                break
+            time.sleep(min(remaining, poll_strategy.delay(attempt)))
+            attempt += 1
+
+        if still_active:
+            logger.error("%d 个浏览器实例在 %s 秒内未停止: %s", len(still_active), timeout, sorted(still_active))
+        self._forget_launched(set(user_ids) - still_active)
+        if self.profile_store is not None:
+            self.profile_store.set_active(set(user_ids) - still_active, False)
+        return {user_id: user_id not in still_active for user_id in user_ids}
+
+    def resume(self, retry_failed=True, replay_starts=False, credentials=None):
+        """
+        处理 journal 中未完成的操作:先按服务端的实际状态批量对账,只重新执行确实没有完成的操作,最后压缩日志。
+
+        - create: 用一次全量列表查找操作开始后创建的同名同组浏览器用户,找到即视为已完成,否则重新创建。
+          journal 不记录代理密码和 Cookie,重新创建时由 credentials 提供;无法提供时保留该操作,留待下次 resume。
+        - delete: 批量查询仍然存在的 ID,只删除这些 ID。
+        - stop: 用一次 browser/local-active 查询,只停止仍处于活动状态的浏览器。
+        - start: 已处于活动状态的浏览器记为已完成并纳入本实例管理;其余的只在 replay_starts 为 True 时重新启动,
+          因为发起启动的进程已经不在了。
+
+        Args:
+            retry_failed (bool, optional): 是否同时处理已记录为失败的操作。默认为 True。
+            replay_starts (bool, optional): 是否重新启动未完成的 start 操作。默认为 False。
+            credentials (callable, optional): credentials(payload) 返回 {"proxy_password": 密码, "cookie": Cookie},
+                补回重新创建所需的、journal 中没有记录的字段;payload 为去掉这些字段后的请求数据,可按其中的
+                name 查找。Cookie 可以是字符串、CookieJar 或文件路径。默认为 None。
+
+        Returns:
+            dict: 包含 reconciled(对账后确认已完成)、replayed(重新执行成功)、failed(重新执行后仍未完成,
+                或缺少 credentials 而未重新执行,下次 resume 时重试)、skipped(未重新启动的 start)的数量。
+
+        Raises:
+            ValueError: 本实例没有 journal。
+            ADSError: 查询浏览器用户或活动浏览器失败,尚未处理的操作保留在 journal 中。
+        """
+        if self.journal is None:
+            raise ValueError("没有配置 journal,无法恢复")
+        ops = [op for op in self.journal.unfinished() if retry_failed or op["state"] == "intent"]
+        summary = {"reconciled": 0, "replayed": 0, "failed": 0, "skipped": 0}
+        by_kind = {}
+        for op in ops:
+            by_kind.setdefault(op["op"], []).append(op)
+        logger.info("恢复 %d 个未完成的操作", len(ops))
+
+        def settle(op, done, replayed=False, **fields):
+            # 旧操作一律结束:重新执行时 create、del_browsers 等会写入新的记录,仍未完成的部分由新记录跟踪,避免下次重复执行
+            self.journal.finish(op["id"], True, **fields)
+            summary["failed" if not done else "replayed" if replayed else "reconciled"] += 1
+
+        creates = by_kind.get("create", [])
+        if creates:
+            candidates = {}  # (名称, 组 ID) -> [(创建时间, user_id)]
+            for item in self.iter_profiles():
+                candidates.setdefault((item.get("name"), str(item.get("group_id"))), []).append(
+                    (float(item.get("created_time") or 0), str(item["user_id"])))
+            for op in creates:
+                payload = op["payload"]
+                # 允许几秒的时钟误差;同名的浏览器用户每个只匹配一次
+                matches = [entry for entry in candidates.get((payload["name"], str(payload["group_id"])), [])
+                           if entry[0] >= op["time"] - 5]
+                if matches:
+                    candidates[(payload["name"], str(payload["group_id"]))].remove(matches[0])
+                    settle(op, True, user_id=matches[0][1])
+                    continue
+                redacted = op.get("redacted", [])
+                values = credentials(payload) if redacted and credentials is not None else {}
+                missing = [key for key in redacted if not (values or {}).get(key)]
+                if missing:
+                    # 不结束旧操作,提供 credentials 后再次 resume 时重新创建
+                    logger.error("重新创建浏览器用户 %s 需要 journal 中没有记录的 %s,请通过 credentials 提供",
+                                 payload["name"], "、".join(missing))
+                    summary["failed"] += 1
+                    continue
+                if "proxy_password" in redacted:
+                    payload = dict(payload, user_proxy_config=dict(payload["user_proxy_config"],
+                                                                   proxy_password=values["proxy_password"]))
+                if "cookie" in redacted:
+                    payload = dict(payload, cookie=_resolve_cookies(values["cookie"]))
+                user_id = self._submit_create(payload)
+                settle(op, user_id is not None, replayed=True, user_id=user_id)
+
+        deletes = by_kind.get("delete", [])
+        if deletes:
+            user_ids = list(dict.fromkeys(user_id for op in deletes for user_id in op["user_ids"]))
+            existing = set()
+            for start in range(0, len(user_ids), 100):
+                existing |= set().union(*self._existing_user_ids(user_ids[start:start + 100]))  # 无法判断的也再删除一次
+            results = self.del_browsers(existing) if existing else {}
+            for op in deletes:
+                remaining = [user_id for user_id in op["user_ids"] if not results.get(user_id, user_id not in existing)]
+                settle(op, not remaining, replayed=any(user_id in existing for user_id in op["user_ids"]),
+                       user_ids=remaining)
+
+        lifecycle = by_kind.get("stop", []) + by_kind.get("start", [])
+        if lifecycle:
+            user_ids = list(dict.fromkeys(user_id for op in lifecycle for user_id in op["user_ids"]))
+            active = self._local_active(fresh=True)
+            if active is None:
+                active = self._active_sessions(user_ids)
+            stops = by_kind.get("stop", [])
+            stopped = self.stop_all([user_id for op in stops for user_id in op["user_ids"] if user_id in active])
+            for op in stops:
+                user_id = op["user_ids"][0]
+                settle(op, stopped.get(user_id, True), replayed=user_id in active)
+            for op in by_kind.get("start", []):
+                user_id = op["user_ids"][0]
+                if user_id in active:
+                    with self._launched_lock:
+                        self._launched.add(user_id)
+                    settle(op, True)
+                elif replay_starts:
+                    settle(op, self.start_session(user_id) is not None, replayed=True)
+                else:
+                    self.journal.finish(op["id"], True, skipped=True)
+                    summary["skipped"] += 1
+
+        self.journal.compact()
+        logger.info("恢复完成: %s", summary)
+        return summary
+
+    def create(self, name, is_proxy=False, proxy_type="", proxy_host="", proxy_port="", proxy_user="", proxy_password="", group_id="", cookies=None):
+        """
+        创建一个新的浏览器用户。
+
+        Args:
+            name (str): 浏览器用户的名称。
+            is_proxy (bool, optional): 是否使用代理。默认为 False。
+            proxy_type (str, optional): 代理类型。默认为空字符串。
+            proxy_host (str, optional): 代理主机。默认为空字符串。
+            proxy_port (str, optional): 代理端口。默认为空字符串。
+            proxy_user (str, optional): 代理用户名。默认为空字符串。
+            proxy_password (str, optional): 代理密码。默认为空字符串。
+            group_id (str, optional): 组 ID。默认为空字符串。
+            cookies (str, CookieJar or os.PathLike, optional): Cookie 字符串、CookieJar 或 Cookie 文件路径。
+                批量创建时应让多个浏览器用户共用同一个 CookieJar;传入 pathlib.Path 时同一文件只加载一次。默认为 None。
+
+        Returns:
+            str: 新创建的浏览器用户的 ID,如果创建失败则返回空字符串。
+        """
+        proxy = (proxy_type, proxy_host, proxy_port, proxy_user, proxy_password) if is_proxy else None
+        payload = _create_payload(name, proxy, group_id if group_id else self.group_id, cookies)
+        return self._submit_create(payload)
+
+    def _submit_create(self, payload):
+        """
+        提交一份 user/create 请求数据,失败时重试。
+
+        Args:
+            payload (dict): 由 _create_payload 构造的请求数据。
+
+        Returns:
+            str: 新创建的浏览器用户的 ID,如果创建失败则返回 None。
+        """
+        def attempt():
+            ret = self._request("POST", "user/create", payload=payload, timeout=(self._connect_timeout(), 60)).text
+            logger.debug("创建浏览器用户 %s 的响应: %s", payload["name"], ret)
+            data = json.loads(ret)
+            if data["msg"] == "Success":
+                return True, data["data"]["id"], data
+            return False, None, data
+
+        with self._journaled("create", payload=payload) as outcome:
+            user_id = self._with_retry("create", f"创建浏览器用户 {payload['name']}", attempt)
+            outcome.update(ok=user_id is not None, user_id=user_id)
+        if user_id is not None:
+            logger.info("创建浏览器成功: %s", user_id)
+            self.invalidate_cache("profiles")
+            if self.profile_store is not None:
+                # 序号等字段要等下一次 sync_profiles 才能补全
+                extra = {"user_proxy_config": payload["user_proxy_config"]}
+                self.profile_store.upsert([Profile(user_id, payload["name"], group_id=str(payload["group_id"]),
+                                                   raw_extra=json.dumps(extra, separators=(",", ":")))])
+        return user_id
+
+    def _spec_payload(self, spec):
+        """
+        校验一份浏览器用户描述并构造 user/create 请求数据。
+
+        Args:
+            spec (dict): 浏览器用户描述,格式见 create_many。
+
+        Returns:
+            dict: 请求数据。
+
+        Raises:
+            ValueError: 描述不合法,例如缺少名称或代理端口不是整数。
+        """
+        if not spec.get("name"):
+            raise ValueError(f"浏览器用户描述缺少名称: {spec}")
+        return _create_payload(spec["name"], spec.get("proxy"), spec.get("group_id") or self.group_id, spec.get("cookies"))
+
+    def create_many(self, specs, concurrency=4):
+        """
+        批量创建浏览器用户,每完成一个就产出一个结果。
+
+        先校验并构造全部请求数据,不合法的描述直接产出错误而不影响其他描述;其余的由线程池并发提交,
+        提交速度仍受 user/create 的限流配额约束。
+
+        Args:
+            specs (iterable): 浏览器用户描述,每个为 dict,包含 "name",可选 "proxy"
+                ((类型, 主机, 端口[, 用户名[, 密码]]) 或 user_proxy_config 格式的 dict)、"group_id" 和 "cookies"。
+            concurrency (int, optional): 同时进行中的创建请求数。默认为 4。
+
+        Yields:
+            tuple: (spec, 结果),结果为新浏览器用户的 ID,失败时为异常对象。
+        """
+        payloads = []
+        for spec in specs:
+            try:
+                payloads.append((spec, self._spec_payload(spec)))
+            except (ValueError, TypeError) as e:
+                yield spec, e
+
+        def submit(item):
+            spec, payload = item
+            user_id = self._submit_create(payload)
+            return user_id if user_id is not None else ADSError(f"创建浏览器用户 {spec['name']} 失败")
+
+        with closing(_stream_results(submit, payloads, concurrency)) as results:
+            for (spec, _), result in results:
+                yield spec, result
+
+    def _group_items(self):
+        """
+        获取全部分组的原始记录,结果按 "groups" 的有效期缓存。
+
+        Returns:
+            list: group/list 返回的分组记录。
+
+        Raises:
+            ADSError: Local API 返回失败。
+        """
+        items = self.cache.get(("groups",))
+        if items is None:
+            # 设置查询参数，默认查询所有分组，每页2000条数据
+            data = self._read("group/list", params={"page": 1, "page_size": 2000})
+            if data["code"] != 0:
+                raise ADSError(f"获取分组失败: {data['msg']}")
+            items = data["data"]["list"]
+            self.cache.set(("groups",), items, self.cache_ttls["groups"])
+        return items
+
+    def get_or_create_groupid(self):
+        """
+        获取或创建一个组 ID。
+
+        Returns:
+            str: 组 ID,如果获取或创建失败则返回 "0"。
+        """
+        try:
+            items = self._group_items()
+        except ADSError:
+            items = []
+        if len(items) > 0:
+            return items[0]["group_id"]
+        else:
+            payload = {
+                "group_name": "default_group"
+            }
+            ret = self._request("POST", "group/create", payload=payload).text
+            data = json.loads(ret)
+            if data["code"] == 0:
+                self.invalidate_cache("groups")
+                return data["data"]["group_id"]
+        return "0"
+
+    def _fetch_profile_page(self, page, page_size, group_id, sort=None):
+        """
+        获取 user/list 的一页数据。
+
+        Returns:
+            list: 本页的浏览器用户记录。
+
+        Raises:
+            ADSError: Local API 返回失败。
+        """
+        data = self._request("GET", "user/list", params=_profile_page_params(page, page_size, group_id, sort)).json()
+        if data["code"] != 0:
+            raise ADSError(f"获取第 {page} 页浏览器用户失败: {data['msg']}")
+        return data["data"]["list"]
+
+    def iter_profiles(self, page_size=100, group_id=None, prefetch=1):
+        """
+        逐页遍历所有浏览器用户,边获取边产出。
+
+        prefetch 大于 0 时由后台线程提前获取后续页面,调用方处理当前页的同时下一页已在路上。
+
+        Args:
+            page_size (int, optional): 每页条数,AdsPower 最大支持 100。默认为 100。
+            group_id (str, optional): 只遍历指定组。默认为 None,遍历全部。
+            prefetch (int, optional): 最多提前获取的页数,0 表示不预取。默认为 1。
+
+        Yields:
+            dict: user/list 返回的原始浏览器用户记录。
+
+        Raises:
+            ADSError: Local API 返回失败。
+            requests.exceptions.RequestException: 请求异常。
+        """
+        if prefetch <= 0:
+            page = 1
+            while True:
+                items = self._fetch_profile_page(page, page_size, group_id)
+                yield from items
+                if len(items) < page_size:
+                    return
+                page += 1
+
+        pages = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def producer():
+            page = 1
+            while not stop.is_set():
+                try:
+                    items = self._fetch_profile_page(page, page_size, group_id)
+                except Exception as e:
+                    items = e
+                while not stop.is_set():
+                    try:
+                        pages.put(items, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if isinstance(items, Exception) or len(items) < page_size:
+                    return
+                page += 1
+
+        threading.Thread(target=producer, daemon=True).start()
+        try:
+            while True:
+                items = pages.get()
+                if isinstance(items, Exception):
+                    raise items
+                yield from items
+                if len(items) < page_size:
+                    return
+        finally:
+            stop.set()  # 调用方提前结束遍历时,通知后台线程停止预取
+
+    def get_browser(self, browser_list):
+        """
+        获取所有浏览器实例的列表。
+
+        Args:
+            browser_list (list): 用于存储浏览器实例信息的列表。
+
+        Returns:
+            bool: 如果获取成功,返回 True,否则返回 False。
+        """
+        try:
+            profiles = self.list_profiles()
+        except (ADSError, requests.exceptions.RequestException) as e:
+            logger.error("获取浏览器实例列表失败: %s", e)
+            return False
+
+        browser_list.clear()
+        browser_list.extend(_browser_info(profile) for profile in profiles)
+        return True
+
+    def list_profiles(self, group_id=None):
+        """
+        获取所有浏览器用户,结果按 "profiles" 的有效期缓存。
+
+        Args:
+            group_id (str, optional): 只获取指定组。默认为 None,获取全部。
+
+        Returns:
+            ProfileIndex: 按 ID 和名称建立索引的浏览器用户集合,只读,可以在多个线程间共享。
+
+        Raises:
+            ADSError: Local API 返回失败。
+            requests.exceptions.RequestException: 请求异常。
+        """
+        key = ("profiles", group_id)
+        profiles = self.cache.get(key)
+        if profiles is None:
+            # 并发的缓存未命中只列出一次
+            profiles, _ = self._flight.do(key, lambda: ProfileIndex(
+                Profile.from_api(item) for item in self.iter_profiles(group_id=group_id)))
+            self.cache.set(key, profiles, self.cache_ttls["profiles"])
+        return profiles
+
+    def sync_profiles(self, full=False, page_size=100):
+        """
+        把浏览器用户和分组同步到 profile_store。
+
+        增量同步按序号从大到小获取,遇到已保存的最大序号即停止,只需要获取新创建的浏览器用户;
+        在 AdsPower 之外删除或修改的浏览器用户需要全量同步才能发现。
+
+        Args:
+            full (bool, optional): 是否全量同步,删除列表中已不存在的浏览器用户。默认为 False;
+                索引为空或 AdsPower 不支持按序号排序时自动改为全量同步。
+            page_size (int, optional): 每页条数,AdsPower 最大支持 100。默认为 100。
+
+        Returns:
+            dict: {"written": 写入的条数, "removed": 删除的条数, "full": 是否为全量同步}。
+
+        Raises:
+            ValueError: 没有配置 profile_store。
+            ADSError: Local API 返回失败。
+            requests.exceptions.RequestException: 请求异常。
+        """
+        store = self.profile_store
+        if store is None:
+            raise ValueError("没有配置 profile_store")
+        store.set_groups(self.list_groups())
+
+        known = store.max_serial()
+        if not full and known > 0:
+            written = 0
+            page = 1
+            while True:
+                items = self._fetch_profile_page(page, page_size, None, sort={"serial_number": "desc"})
+                serials = [int(item.get("serial_number") or 0) for item in items]
+                if serials != sorted(serials, reverse=True):
+                    logger.info("AdsPower 不支持按序号排序,改为全量同步")
+                    return self.sync_profiles(full=True, page_size=page_size)
+                fresh = [Profile.from_api(item) for item, serial in zip(items, serials) if serial > known]
+                written += store.upsert(fresh)
+                if len(fresh) < len(items) or len(items) < page_size:
+                    break
+                page += 1
+            store.set_meta("last_sync", time.time())
+            return {"written": written, "removed": 0, "full": False}
+
+        written, removed = store.replace_all(Profile.from_api(item) for item in self.iter_profiles(page_size=page_size))
+        now = time.time()
+        store.set_meta("last_sync", now)
+        store.set_meta("last_full_sync", now)
+        return {"written": written, "removed": removed, "full": True}
+
+    def del_browser(self, user_id):
+        def attempt():
+            response = self._request("POST", "user/delete", payload={"user_ids": [user_id]})
+            logger.debug("尝试删除浏览器用户 %s 的响应: %s", user_id, response.text)
+            data = response.json()
+            if data.get("code") != 0:
+                return False, None, data
+
+            # 交叉验证删除是否成功
+            data = self._request("GET", f"user/list?user_id={user_id}").json()
+            if data.get("code") == 0 and len(data.get("data", {}).get("list", [])) == 0:
+                return True, True, data
+            return False, None, {"msg": f"交叉验证失败,浏览器用户 {user_id} 可能未被删除"}
+
+        with self._hold_profile(user_id), self._journaled("delete", user_ids=[user_id]) as outcome:
+            if self._with_retry("del_browser", f"删除浏览器用户 {user_id}", attempt):
+                outcome["ok"] = True
+                logger.info("交叉验证通过,浏览器用户 %s 已成功删除", user_id)
+                self.invalidate_cache("profiles")
+                self.invalidate_cache("info", user_id)
+                if self.profile_store is not None:
+                    self.profile_store.remove([user_id])
+                return True
+        return False
+
+    def _existing_user_ids(self, user_ids):
+        """
+        用一次查询找出 user_ids 中仍然存在的浏览器用户。
+
+        优先使用 v2 的 browser-profile/list(支持按多个 ID 查询);旧版本 AdsPower 不支持时回退为逐个查询 v1 的 user/list。
+        v1 查询返回错误(例如触发频率限制)的 ID 无法判断是否存在,单独返回,由调用方决定如何处理。
+
+        Args:
+            user_ids (list): 浏览器用户 ID 列表,不超过 100 个。
+
+        Returns:
+            tuple: (确认存在的 ID 集合, 无法判断的 ID 集合)。
+        """
+        try:
+            payload = {"profile_id": list(user_ids), "page": 1, "limit": len(user_ids)}
+            data = self._request("POST", "browser-profile/list", payload=payload, version="v2").json()
+            if data.get("code") == 0:
+                return {item.get("profile_id", item.get("user_id")) for item in data["data"]["list"]}, set()
+        except ValueError:
+            pass  # 响应不是 JSON,说明当前 AdsPower 版本没有 v2 接口
+
+        existing, undetermined = set(), set()
+        for user_id in user_ids:
+            data = self._request("GET", f"user/list?user_id={user_id}").json()
+            if data.get("code") != 0:
+                undetermined.add(user_id)
+            elif len(data.get("data", {}).get("list", [])) > 0:
+                existing.add(user_id)
+        return existing, undetermined
+
+    def del_browsers(self, user_ids, chunk_size=100):
+        """
+        批量删除浏览器用户。
+
+        每块 ID 用一次 user/delete 删除,再用一次查询交叉验证整块,只重试验证后仍然存在的 ID。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            chunk_size (int, optional): 每次删除的 ID 数量,不超过 100。默认为 100。
+
+        Returns:
+            dict: {user_id: bool},True 表示已确认删除。
+        """
+        user_ids = list(dict.fromkeys(user_ids))  # 去重并保持顺序
+        results = {user_id: False for user_id in user_ids}
+
+        policy = self.retry_policy
+        for start in range(0, len(user_ids), chunk_size):
+            with self._journaled("delete", user_ids=user_ids[start:start + chunk_size]) as outcome:
+                remaining = user_ids[start:start + chunk_size]
+                for attempt in range(policy.max_attempts):
+                    kind = RETRYABLE
+                    try:
+                        data = self._request("POST", "user/delete", payload={"user_ids": remaining}).json()
+                        if data.get("code") != 0:
+                            kind = policy.classify(data=data)
+                            self.metrics.increment("ads_failures_total", labels={"operation": "del_browsers", "kind": kind})
+                            self.metrics.increment("ads_api_errors_total",
+                                                   labels={"endpoint": "user/delete", "code": str(data.get("code"))})
+                            logger.warning("第 %d 次批量删除失败: %s", attempt + 1, data.get("msg"))
+
+                        # 无论接口是否报错都交叉验证,部分 ID 可能已被删除
+                        existing, undetermined = self._existing_user_ids(remaining)
+                        survivors = existing | undetermined  # 无法判断的 ID 按未删除处理,下一轮再试
+                        for user_id in remaining:
+                            if user_id not in survivors:
+                                results[user_id] = True
+                                self.invalidate_cache("info", user_id)
+                        self.invalidate_cache("profiles")
+                        if self.profile_store is not None:
+                            self.profile_store.remove(user_id for user_id in remaining if user_id not in survivors)
+                        remaining = [user_id for user_id in remaining if user_id in survivors]
+                        if not remaining:
+                            break
+                        logger.warning("交叉验证失败,%d 个浏览器用户可能未被删除", len(remaining))
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        kind = policy.classify(error=e)
+                        self.metrics.increment("ads_failures_total", labels={"operation": "del_browsers", "kind": kind})
+                        logger.warning("批量删除浏览器用户时发生异常: %s", e)
+
+                    if kind == FATAL or attempt + 1 >= policy.max_attempts:
+                        break
+                    self.metrics.increment("ads_retries_total", labels={"operation": "del_browsers"})
+                    time.sleep(policy.delay(attempt, kind))  # 只重试剩余的 ID
+
+                result = "failed" if remaining else "ok"
+                self.metrics.increment("ads_operations_total", labels={"operation": "del_browsers", "result": result})
+                if remaining:
+                    logger.error("批量删除浏览器用户失败: %s", remaining)
+                outcome.update(ok=not remaining, user_ids=remaining)  # 失败时只记录剩余的 ID
+
+        return results
+
+    def _update_stored(self, user_ids, **changes):
+        """
+        把本地修改同步到缓存和 profile_store。
+
+        Args:
+            user_ids (list): 已修改的浏览器用户 ID。
+            **changes: Profile 的字段和新值;user_proxy_config 写入不常用字段。
+        """
+        for user_id in user_ids:
+            self.invalidate_cache("info", user_id)
+        self.invalidate_cache("profiles")
+        if self.profile_store is None:
+            return
+        proxy = changes.pop("user_proxy_config", None)
+        profiles = []
+        for user_id in user_ids:
+            profile = self.profile_store.get(user_id)
+            if profile is None:
+                continue
+            if proxy is not None:
+                extra = dict(profile.extra, user_proxy_config=proxy)
+                profile = replace(profile, raw_extra=json.dumps(extra, ensure_ascii=False, separators=(",", ":")))
+            profiles.append(replace(profile, **changes))
+        self.profile_store.upsert(profiles)
+
+    def update_proxies(self, mapping, concurrency=4, checkpoint=None):
+        """
+        批量修改浏览器用户的代理,每完成一个就产出一个结果。
+
+        先校验全部代理,不合法的直接产出错误而不影响其他浏览器用户;其余的由线程池并发提交 user/update,
+        提交速度仍受限流配额约束。
+
+        Args:
+            mapping (dict): {user_id: 代理},代理为 (类型, 主机, 端口[, 用户名[, 密码]])、user_proxy_config 格式的 dict,
+                或 None 表示不使用代理。
+            concurrency (int, optional): 同时进行中的修改请求数。默认为 4。
+            checkpoint (str or Checkpoint, optional): 进度检查点或其文件路径。中断后用同一个检查点重新运行时,
+                已改为相同代理的浏览器用户直接产出 True,不再发送请求。默认为 None,不记录进度。
+
+        Yields:
+            tuple: (user_id, 结果),结果为 True,失败时为异常对象。
+        """
+        owns_checkpoint = isinstance(checkpoint, str)
+        if owns_checkpoint:
+            checkpoint = Checkpoint(checkpoint)
+
+        def submit(item):
+            user_id, config, target = item
+
+            def attempt():
+                data = self._request("POST", "user/update", payload={"user_id": user_id, "user_proxy_config": config}).json()
+                return data.get("code") == 0, True, data
+
+            if self._with_retry("update_proxy", f"修改浏览器用户 {user_id} 的代理", attempt) is None:
+                return ADSError(f"修改浏览器用户 {user_id} 的代理失败")
+            self._update_stored([user_id], user_proxy_config=config)
+            if checkpoint is not None:
+                checkpoint.mark([(user_id, target)])
+            return True
+
+        try:
+            pending = []
+            for user_id, proxy in mapping.items():
+                try:
+                    config = _proxy_config(proxy)
+                except (ValueError, TypeError) as e:
+                    yield user_id, e
+                    continue
+                # 检查点只记录代理配置的摘要,代理密码不会写入文件
+                target = hashlib.sha1(json.dumps(config, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+                if checkpoint is not None and (user_id, target) in checkpoint:
+                    yield user_id, True
+                    continue
+                pending.append((user_id, config, target))
+            with closing(_stream_results(submit, pending, concurrency)) as results:
+                for (user_id, _, _), result in results:
+                    yield user_id, result
+        finally:
+            if owns_checkpoint:
+                checkpoint.close()
+
+    def move_to_group(self, user_ids, group_id, chunk_size=100, concurrency=2, checkpoint=None):
+        """
+        批量把浏览器用户移动到另一个分组,每完成一块就产出该块中每个浏览器用户的结果。
+
+        每块 ID 用一次 user/regroup 移动,多块由线程池并发提交,提交速度仍受限流配额约束。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+            group_id (str): 目标组 ID。
+            chunk_size (int, optional): 每次移动的 ID 数量,不超过 100。默认为 100。
+            concurrency (int, optional): 同时进行中的移动请求数。默认为 2。
+            checkpoint (str or Checkpoint, optional): 进度检查点或其文件路径,含义见 update_proxies。默认为 None。
+
+        Yields:
+            tuple: (user_id, 结果),结果为 True,失败时为异常对象。
+        """
+        group_id = str(group_id)
+        owns_checkpoint = isinstance(checkpoint, str)
+        if owns_checkpoint:
+            checkpoint = Checkpoint(checkpoint)
+        try:
+            group_name = next((item.get("group_name") or "" for item in self._group_items()
+                               if str(item["group_id"]) == group_id), "")
+        except (ADSError, requests.exceptions.RequestException):
+            group_name = ""  # 只影响 profile_store 中的组名,下一次 sync_profiles 会补全
+
+        def submit(chunk):
+            def attempt():
+                data = self._request("POST", "user/regroup", payload={"user_ids": chunk, "group_id": group_id}).json()
+                return data.get("code") == 0, True, data
+
+            if self._with_retry("move_to_group", f"移动 {len(chunk)} 个浏览器用户到分组 {group_id}", attempt) is None:
+                return ADSError(f"移动浏览器用户到分组 {group_id} 失败")
+            self._update_stored(chunk, group_id=group_id, group_name=group_name)
+            if checkpoint is not None:
+                checkpoint.mark((user_id, group_id) for user_id in chunk)
+            return True
+
+        try:
+            pending = []
+            for user_id in dict.fromkeys(user_ids):
+                if checkpoint is not None and (user_id, group_id) in checkpoint:
+                    yield user_id, True
+                else:
+                    pending.append(user_id)
+            chunks = (pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size))
+            with closing(_stream_results(submit, chunks, concurrency)) as results:
+                for chunk, result in results:
+                    for user_id in chunk:
+                        yield user_id, result
+        finally:
+            if owns_checkpoint:
+                checkpoint.close()
+
+    def get_group(self, group_list):
+        """
+        获取组列表。
+        Args:
+            group_list (list): 用于存储组信息的列表。
+        Returns:
+            bool: 如果获取成功,返回 True,否则返回 False。
+        """
+        try:
+            items = self._group_items()
+        except ADSError as e:
+            logger.error("%s", e)
+            return False
+        except requests.exceptions.RequestException as e:
+            logger.error("获取分组列表时发生请求异常: %s", e)
+            return False
+
+        group_list.clear()
+        group_list.extend(Group.from_api(item).to_dict() for item in items)
+        return True
+
+    def list_groups(self):
+        """
+        获取所有分组,与 get_group 共用缓存。
+
+        Returns:
+            list: Group 对象。
+
+        Raises:
+            ADSError: Local API 返回失败。
+            requests.exceptions.RequestException: 请求异常。
+        """
+        return [Group.from_api(item) for item in self._group_items()]
+
+    def get_info(self, user_id):
+        """
+        获取指定用户 ID 的浏览器实例信息,结果按 "info" 的有效期缓存。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            dict: user/list 返回的浏览器用户记录,如果不存在或获取失败则返回 None。
+        """
+        profile = self.get_profile(user_id)
+        return profile.to_dict() if profile is not None else None
+
+    def get_profile(self, user_id):
+        """
+        获取指定用户 ID 的浏览器用户,结果按 "info" 的有效期缓存。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            Profile: 浏览器用户,如果不存在或获取失败则返回 None。
+        """
+        profile = self.cache.get(("info", user_id))
+        if profile is not None:
+            return profile
+
+        try:
+            data = self._read(f"user/list?user_id={user_id}")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("获取浏览器用户 %s 的信息时发生请求异常: %s", user_id, e)
+            return None
+        if data.get("code") != 0 or not data["data"]["list"]:
+            logger.warning("获取浏览器用户 %s 的信息失败: %s", user_id, data.get("msg"))
+            return None
+        profile = Profile.from_api(data["data"]["list"][0])
+        self.cache.set(("info", user_id), profile, self.cache_ttls["info"])
+        return profile
+
+
+class ActiveTracker:
+    def __init__(self, ads, interval=1.0):
+        """
+        初始化活动浏览器跟踪器:后台线程定期用一次 browser/local-active 扫描本机已打开的浏览器,在内存中维护
+        user_id -> BrowserSession 的表,并把变化以事件的形式推送给订阅者。通常通过 ADS.track 创建。
+
+        事件为 (类型, BrowserSession),类型为:
+            "start": 通过 ADS 启动了浏览器,或扫描发现了新的浏览器(包括第一次扫描时已打开的浏览器)。
+            "stop": 通过 ADS 停止了浏览器。
+            "crash": 浏览器没有通过 ADS 停止就从扫描结果中消失,例如崩溃或在 AdsPower 界面中被关闭。
+
+        Args:
+            ads (ADS): 用于查询的 ADS 实例。
+            interval (float, optional): 扫描间隔秒数。默认为 1.0。
+        """
+        self.ads = ads
+        self.interval = interval
+        self._sessions = {}  # user_id -> BrowserSession
+        self._stopped = {}  # user_id -> 通过 ADS 停止的时间,用于忽略停止前取得的扫描结果
+        self._stopping = {}  # user_id -> 正在通过 ADS 停止的次数
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        先同步扫描一次,再启动后台线程。
+
+        Returns:
+            ActiveTracker: 自身,便于链式调用。
+        """
+        self.sweep()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """
+        停止后台线程。
+        """
+        self._closed.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def subscribe(self, callback=None):
+        """
+        订阅事件。回调在后台线程或调用 ADS 的线程中执行,应当尽快返回;回调抛出的异常只记录日志。
+
+        Args:
+            callback (callable, optional): callback(类型, BrowserSession)。默认为 None,返回一个接收事件的队列。
+
+        Returns:
+            callable 或 queue.Queue: 订阅对象,传给 unsubscribe 可以取消订阅。
+        """
+        if callback is None:
+            subscriber = queue.Queue()
+            deliver = lambda kind, session: subscriber.put((kind, session))  # 队列中的事件为 (类型, BrowserSession)
+        else:
+            subscriber = deliver = callback
+        with self._lock:
+            self._subscribers.append((subscriber, deliver))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        取消订阅。
+
+        Args:
+            subscriber: subscribe 返回的订阅对象。
+        """
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] is not subscriber]
+
+    def _emit(self, events):
+        if not events:
+            return
+        with self._lock:
+            callbacks = [entry[1] for entry in self._subscribers]
+        for kind, session in events:
+            _run_hooks(callbacks, kind, session)
+
+    def get(self, user_id):
+        """
+        获取活动浏览器,只查询内存中的表。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            BrowserSession: 活动浏览器,不处于活动状态时为 None。
+        """
+        return self._sessions.get(user_id)
+
+    def is_active(self, user_id):
+        """
+        判断浏览器是否处于活动状态,只查询内存中的表。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            bool: 如果处于活动状态,返回 True,否则返回 False。
+        """
+        return user_id in self._sessions
+
+    def sessions(self):
+        """
+        获取所有活动浏览器。
+
+        Returns:
+            dict: {user_id: BrowserSession} 的副本。
+        """
+        with self._lock:
+            return dict(self._sessions)
+
+    def note_started(self, session):
+        """
+        记录通过 ADS 启动的浏览器,由 ADS.start_session 调用。
+
+        Args:
+            session (BrowserSession): 已启动的浏览器实例。
+        """
+        with self._lock:
+            self._stopped.pop(session.user_id, None)
+            is_new = session.user_id not in self._sessions
+            self._sessions[session.user_id] = session
+        if is_new:
+            self._emit([("start", session)])
+
+    @contextmanager
+    def stopping(self, user_id):
+        """
+        标记正在通过 ADS 停止浏览器,期间扫描不会把它的消失当作 crash。由 ADS.stop_browser 使用。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+        """
+        with self._lock:
+            self._stopping[user_id] = self._stopping.get(user_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stopping[user_id] -= 1
+                if self._stopping[user_id] == 0:
+                    del self._stopping[user_id]
+
+    def note_stopped(self, user_id):
+        """
+        记录通过 ADS 停止的浏览器,由 ADS.stop_browser 调用。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+        """
+        with self._lock:
+            self._stopped[user_id] = time.time()
+            session = self._sessions.pop(user_id, None)
+        if session is not None:
+            self._emit([("stop", session)])
+
+    def sweep(self):
+        """
+        扫描一次本机已打开的浏览器并更新表。没有 browser/local-active 接口时只逐个检查表中和本实例启动的浏览器。
+        查询失败时保留原来的表,不会误报 crash。
+        """
+        started = time.time()
+        try:
+            active = self.ads._local_active(fresh=True)  # 缓存或共享的结果可能早于 started,会误报 crash
+            if active is None:
+                with self._lock:
+                    known = list(self._sessions)
+                active = self.ads._active_sessions(list(dict.fromkeys(known + list(self.ads.launched))))
+        except (ADSError, requests.exceptions.RequestException) as e:
+            logger.warning("扫描活动浏览器失败: %s", e)
+            return
+
+        events = []
+        with self._lock:
+            for user_id, item in active.items():
+                session = self._sessions.get(user_id)
+                if session is not None:
+                    session.last_seen = started
+                elif self._stopped.get(user_id, 0) < started:  # 扫描开始后才停止的浏览器仍可能出现在结果中
+                    session = self._sessions[user_id] = BrowserSession.from_api(user_id, item)
+                    events.append(("start", session))
+            for user_id, session in list(self._sessions.items()):
+                # 扫描开始后才启动的浏览器可能还不在结果中
+                if user_id not in active and session.last_seen < started and user_id not in self._stopping:
+                    del self._sessions[user_id]
+                    events.append(("crash", session))
+            self._stopped = {user_id: at for user_id, at in self._stopped.items() if at >= started}
+        crashed = [session.user_id for kind, session in events if kind == "crash"]
+        for user_id in crashed:
+            logger.warning("浏览器实例 %s 没有通过 ADS 停止就已关闭", user_id)
+        if crashed:
+            self.ads._forget_launched(crashed)  # 释放 max_live_browsers 的名额
+        self._emit(events)
+
+    def _run(self):
+        while not self._closed.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("扫描活动浏览器失败")
+
+
+class PooledBrowser:
+    def __init__(self, user_id, webdriver, debug_port):
+        """
+        初始化浏览器池中的一个已启动的浏览器实例。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+            webdriver (str): WebDriver 路径。
+            debug_port (str): 调试地址,例如 "127.0.0.1:9222"。
+        """
+        self.user_id = user_id
+        self.webdriver = webdriver
+        self.debug_port = debug_port
+        self.started_at = time.monotonic()
+        self.uses = 0
+        self.healthy = True  # 调用方发现浏览器异常时可以置为 False,归还后会被重启
+
+    @property
+    def age(self):
+        """
+        float: 浏览器启动至今的秒数。
+        """
+        return time.monotonic() - self.started_at
+
+
+def _debug_port_healthy(browser):
+    """
+    BrowserPool 默认的健康检查:调试端口可以连接即视为健康。
+
+    Args:
+        browser (PooledBrowser): 要检查的浏览器。
+
+    Returns:
+        bool: 如果健康,返回 True,否则返回 False。
+    """
+    return _probe_debug_port(browser.debug_port)
+
+
+class BrowserPool:
+    def __init__(self, ads, user_ids, size=None, max_age=None, max_uses=None, health_check=_debug_port_healthy,
+                 launch_concurrency=2, launch_timeout=30, refill_interval=1.0, start_kwargs=None, max_launch_failures=5,
+                 launch_backoff=2.0, max_launch_backoff=300):
+        """
+        初始化浏览器池,后台线程预先启动浏览器,调用方租用时无需等待启动。
+
+        Args:
+            ads (ADS): 用于启动和停止浏览器的 ADS 实例。
+            user_ids (iterable): 浏览器池可以使用的浏览器用户 ID。
+            size (int, optional): 保持空闲待用的浏览器数量。默认为 None,即 user_ids 的数量。
+            max_age (float, optional): 浏览器启动后最多使用的秒数,超过后重启。默认为 None,不限制。
+            max_uses (int, optional): 浏览器最多被租用的次数,超过后重启。默认为 None,不限制。
+            health_check (callable, optional): health_check(browser) 返回 False 时重启该浏览器,
+                后台线程定期对空闲浏览器调用。默认为检查调试端口是否可以连接,传入 None 表示不检查。
+            launch_concurrency (int, optional): 同时进行中的启动数量。默认为 2。
+            launch_timeout (float, optional): 启动后等待调试端口就绪的最长秒数。默认为 30。
+            refill_interval (float, optional): 后台线程检查补充和健康状态的间隔秒数。默认为 1.0。
+            start_kwargs (dict, optional): 传给 ADS.start_browser 的其他参数。默认为 None。
+            max_launch_failures (int, optional): 同一浏览器用户连续启动失败多少次后不再使用,记录在 stats() 的
+                "dropped" 中。默认为 5。
+            launch_backoff (float, optional): 启动失败后第一次重试前等待的秒数,之后每次失败翻倍。默认为 2.0。
+            max_launch_backoff (float, optional): 启动失败后等待秒数的上限。默认为 300。
+        """
+        self.ads = ads
+        self._cold = deque(dict.fromkeys(user_ids))  # 尚未启动的浏览器用户
+        self.size = len(self._cold) if size is None else size
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.health_check = health_check
+        self.launch_timeout = launch_timeout
+        self.refill_interval = refill_interval
+        self.start_kwargs = start_kwargs or {}
+        self.max_launch_failures = max_launch_failures
+        self.launch_backoff = launch_backoff
+        self.max_launch_backoff = max_launch_backoff
+        self._failures = {}  # user_id -> 连续启动失败次数
+        self._cooling = {}  # user_id -> 可以再次启动的时刻(time.monotonic)
+        self._dropped = []  # 连续失败 max_launch_failures 次后不再使用的浏览器用户
+        self._idle = deque()
+        self._leased = {}
+        self._starting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "leases": 0, "hits": 0, "wait_time": 0.0,
+            "launches": 0, "launch_failures": 0, "launch_time": 0.0, "recycles": 0
+        }
+        self._executor = ThreadPoolExecutor(max_workers=launch_concurrency)
+        self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _expired(self, browser):
+        """
+        判断浏览器是否超过 max_age 或 max_uses。
+
+        Returns:
+            bool: 如果需要重启,返回 True,否则返回 False。
+        """
+        return ((self.max_age is not None and browser.age > self.max_age)
+                or (self.max_uses is not None and browser.uses >= self.max_uses))
+
+    def _launch(self, user_id):
+        """
+        启动一个浏览器并等待调试端口就绪,成功后放入空闲队列。已启动但没有就绪的浏览器会先停止;
+        失败时按指数退避等待后由后台线程重试,连续失败 max_launch_failures 次后不再使用该浏览器用户。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+        """
+        started = time.monotonic()
+        browser = None
+        webdriver = None
+        try:
+            webdriver, debug_port = self.ads.start_browser(user_id, **self.start_kwargs)
+            if webdriver is not None and self.ads.wait_until_active([user_id], timeout=self.launch_timeout,
+                                                                    probe_debug_port=True)[user_id] is not None:
+                browser = PooledBrowser(user_id, webdriver, debug_port)
+        except Exception as e:
+            logger.exception("浏览器池启动浏览器实例 %s 时发生异常: %s", user_id, e)
+        if browser is None and webdriver is not None:
+            # 已经启动但没有就绪,先停止,避免浏览器实例泄漏并一直占用 max_live_browsers 的名额
+            try:
+                self.ads.stop_browser(user_id)
+            except Exception as e:
+                logger.exception("浏览器池停止未就绪的浏览器实例 %s 时发生异常: %s", user_id, e)
+
+        with self._cond:
+            self._starting -= 1
+            if browser is None:
+                self._stats["launch_failures"] += 1
+                failures = self._failures[user_id] = self._failures.get(user_id, 0) + 1
+                if failures >= self.max_launch_failures:
+                    logger.error("浏览器池中的浏览器用户 %s 连续启动失败 %d 次,不再使用", user_id, failures)
+                    self._dropped.append(user_id)
+                else:
+                    delay = min(self.launch_backoff * 2 ** (failures - 1), self.max_launch_backoff)
+                    self._cooling[user_id] = time.monotonic() + delay
+                return
+            self._failures.pop(user_id, None)
+            self._stats["launches"] += 1
+            self._stats["launch_time"] += time.monotonic() - started
+            closed = self._closed
+            if not closed:
+                self._idle.append(browser)
+                self._cond.notify_all()
+        if closed:
+            self.ads.stop_browser(user_id)  # 启动期间浏览器池已关闭
+
+    def _retire(self, browser):
+        """
+        停止一个浏览器,之后由后台线程重新启动。必须在持有 self._cond 时调用。
+
+        Args:
+            browser (PooledBrowser): 要停止的浏览器。
+        """
+        self._stats["recycles"] += 1
+
+        def stop():
+            self.ads.stop_browser(browser.user_id)
+            with self._cond:
+                self._cold.append(browser.user_id)
+                self._cond.notify_all()
+
+        self._executor.submit(stop)
+
+    def _refill_loop(self):
+        """
+        后台线程:淘汰过期或不健康的空闲浏览器,并启动浏览器直到空闲数量达到 size。
+        """
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                for browser in [browser for browser in self._idle if self._expired(browser)]:
+                    self._idle.remove(browser)
+                    self._retire(browser)
+                now = time.monotonic()
+                for user_id in [user_id for user_id, ready_at in self._cooling.items() if ready_at <= now]:
+                    del self._cooling[user_id]
+                    self._cold.append(user_id)  # 退避结束,放到队尾再试
+                while self._cold and len(self._idle) + self._starting < self.size:
+                    self._starting += 1
+                    self._executor.submit(self._launch, self._cold.popleft())
+                idle = list(self._idle)
+
+            # 健康检查可能涉及网络 I/O,在锁外进行
+            if self.health_check is not None:
+                unhealthy = [browser for browser in idle if not self.health_check(browser)]
+                with self._cond:
+                    for browser in unhealthy:
+                        if browser in self._idle:
+                            self._idle.remove(browser)
+                            self._retire(browser)
+
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self.refill_interval)
+
+    def acquire(self, timeout=None):
+        """
+        租用一个空闲的浏览器,没有空闲浏览器时等待后台线程启动。
+
+        Args:
+            timeout (float, optional): 最长等待秒数。默认为 None,一直等待。
+
+        Returns:
+            PooledBrowser: 租用的浏览器,使用完毕后必须调用 release 归还。
+
+        Raises:
+            TimeoutError: 超时仍没有空闲浏览器。
+        """
+        started = time.monotonic()
+        with self._cond:
+            hit = bool(self._idle)
+            if not self._cond.wait_for(lambda: self._idle or self._closed, timeout):
+                raise TimeoutError(f"{timeout} 秒内没有可用的浏览器")
+            if self._closed:
+                raise RuntimeError("浏览器池已关闭")
+            browser = self._idle.popleft()
+            self._leased[browser.user_id] = browser
+            self._stats["leases"] += 1
+            self._stats["hits"] += hit
+            self._stats["wait_time"] += time.monotonic() - started
+            self._cond.notify_all()  # 唤醒后台线程补充空闲浏览器
+            return browser
+
+    def release(self, browser):
+        """
+        归还租用的浏览器。过期、不健康或浏览器池已关闭时会停止该浏览器。
+
+        Args:
+            browser (PooledBrowser): 由 acquire 租用的浏览器。
+        """
+        with self._cond:
+            self._leased.pop(browser.user_id, None)
+            browser.uses += 1
+            closed = self._closed
+            if closed:
+                pass
+            elif not browser.healthy or self._expired(browser):
+                self._retire(browser)
+            else:
+                self._idle.append(browser)
+            self._cond.notify_all()
+        if closed:
+            self.ads.stop_browser(browser.user_id)  # 浏览器池已关闭,不再重启
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        以上下文管理器方式租用浏览器,退出时自动归还。
+
+        Args:
+            timeout (float, optional): 最长等待秒数。默认为 None,一直等待。
+
+        Yields:
+            PooledBrowser: 租用的浏览器,通过 webdriver 和 debug_port 属性连接。
+        """
+        browser = self.acquire(timeout)
+        try:
+            yield browser
+        finally:
+            self.release(browser)
+
+    def stats(self):
+        """
+        获取浏览器池的统计数据。
+
+        Returns:
+            dict: 包含租用次数、命中率、平均等待时间、启动次数、平均启动耗时、重启次数、当前各状态数量,
+                以及因连续启动失败而不再使用的浏览器用户列表 "dropped"。
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["hit_rate"] = stats["hits"] / stats["leases"] if stats["leases"] else 0.0
+            stats["avg_wait_time"] = stats["wait_time"] / stats["leases"] if stats["leases"] else 0.0
+            stats["avg_launch_time"] = stats["launch_time"] / stats["launches"] if stats["launches"] else 0.0
+            stats["idle"] = len(self._idle)
+            stats["leased"] = len(self._leased)
+            stats["starting"] = self._starting
+            stats["cooling"] = len(self._cooling)
+            stats["dropped"] = list(self._dropped)
+            return stats
+
+    def close(self):
+        """
+        关闭浏览器池,停止所有空闲的浏览器;仍被租用的浏览器在归还时停止。
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            while self._idle:
+                self._retire(self._idle.popleft())
+            self._cond.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+
+class ADSCluster:
+    def __init__(self, nodes, **kwargs):
+        """
+        初始化由多台 AdsPower 组成的集群,提供与 ADS 相同的方法,按浏览器用户所在的节点转发调用。
+
+        每个节点是一个独立的 ADS 实例,各自拥有限流器、连接池和缓存。浏览器用户所在的节点在列出、创建或
+        第一次用到时确定并记住;新建浏览器用户放在浏览器用户最少的节点上。
+
+        Args:
+            nodes (list): 节点,每个为 Local API 的 URL 或已构造好的 ADS 实例。
+            **kwargs: 用 URL 构造 ADS 时传入的其他参数,例如 rate_limits、pool_size。每个节点需要各自的
+                profile_store,因此这里不能传入 profile_store。
+        """
+        if not nodes:
+            raise ValueError("集群至少需要一个节点")
+        if "profile_store" in kwargs:
+            raise ValueError("每个节点需要各自的 profile_store,请传入已构造好的 ADS 实例")
+        self.nodes = [node if isinstance(node, ADS) else ADS(node, **kwargs) for node in nodes]
+        self._owners = {}  # user_id -> 节点
+        self._counts = None  # 节点 -> 浏览器用户数量,第一次创建时按已知信息估计,list_profiles 时校正
+        self._lock = threading.Lock()
+
+    def close(self):
+        """
+        关闭所有节点。
+        """
+        for node in self.nodes:
+            node.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _map_nodes(self, fn, items=None):
+        """
+        在每个节点上并行调用 fn。
+
+        Args:
+            fn (callable): fn(节点, 参数) 或 fn(节点)。
+            items (dict, optional): {节点: 参数}。默认为 None,在所有节点上调用 fn(节点)。
+
+        Returns:
+            list: (节点, 结果) 列表,调用抛出异常时结果为异常对象。
+        """
+        calls = [(node, (node,)) for node in self.nodes] if items is None else \
+            [(node, (node, arg)) for node, arg in items.items()]
+        if not calls:
+            return []
+
+        def call(args):
+            try:
+                return fn(*args)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            return list(zip((node for node, _ in calls), executor.map(call, (args for _, args in calls))))
+
+    def _remember(self, node, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._owners[user_id] = node
+
+    def _forget(self, node, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                if self._owners.pop(user_id, None) is node and self._counts is not None:
+                    self._counts[node] -= 1
+
+    def locate(self, user_ids):
+        """
+        查找浏览器用户所在的节点。未知的 ID 在所有节点上并行查询,每个节点每 100 个 ID 查询一次。
+
+        只记住节点明确返回的 ID;某个节点查询失败或无法判断时不记录,已经找到的所在节点也不会被其他节点覆盖。
+
+        Args:
+            user_ids (iterable): 浏览器用户 ID。
+
+        Returns:
+            dict: {user_id: ADS},找不到的 ID 不包含在内。
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        with self._lock:
+            found = {user_id: self._owners[user_id] for user_id in user_ids if user_id in self._owners}
+        unknown = [user_id for user_id in user_ids if user_id not in found]
+        if unknown:
+            def existing(node):
+                return set().union(*(node._existing_user_ids(unknown[start:start + 100])[0]
+                                     for start in range(0, len(unknown), 100)))
+
+            for node, result in self._map_nodes(existing):
+                if isinstance(result, Exception):
+                    logger.warning("在节点 %s 上查找浏览器用户时发生异常: %s", node.matrix, result)
+                    continue
+                with self._lock:
+                    owned = [user_id for user_id in result if user_id not in found and user_id not in self._owners]
+                    for user_id in owned:
+                        self._owners[user_id] = found[user_id] = node
+                for user_id in result:
+                    if found.get(user_id, node) is not node:
+                        logger.warning("浏览器用户 %s 同时出现在节点 %s 和 %s 上,使用 %s",
+                                       user_id, found[user_id].matrix, node.matrix, found[user_id].matrix)
+        return found
+
+    def _owner(self, user_id):
+        node = self.locate([user_id]).get(user_id)
+        if node is None:
+            logger.warning("在所有节点上都找不到浏览器用户 %s", user_id)
+        return node
+
+    def _group_by_owner(self, user_ids):
+        """
+        按所在节点对浏览器用户分组。
+
+        Returns:
+            tuple: ({节点: [user_id]}, 找不到的 user_id 列表)。
+        """
+        owners = self.locate(user_ids)
+        groups = {}
+        for user_id, node in owners.items():
+            groups.setdefault(node, []).append(user_id)
+        return groups, [user_id for user_id in dict.fromkeys(user_ids) if user_id not in owners]
+
+    def start_browser(self, user_id, *args, **kwargs):
+        """
+        在浏览器用户所在的节点上启动浏览器实例,参数和返回值见 ADS.start_browser。
+        """
+        node = self._owner(user_id)
+        return node.start_browser(user_id, *args, **kwargs) if node is not None else (None, None)
+
+    def start_session(self, user_id, *args, **kwargs):
+        """
+        在浏览器用户所在的节点上启动浏览器实例,参数和返回值见 ADS.start_session。
+        """
+        node = self._owner(user_id)
+        return node.start_session(user_id, *args, **kwargs) if node is not None else None
+
+    def start_browsers(self, user_ids, options=None, concurrency=4):
+        """
+        批量启动浏览器实例,各节点并行,参数和返回值见 ADS.start_browsers。concurrency 对每个节点分别生效。
         """
-        初始化 ADS 类。
+        groups, missing = self._group_by_owner(user_ids)
+        for user_id in missing:
+            yield user_id, ADSError(f"在所有节点上都找不到浏览器用户 {user_id}")
+        options = options or _launch_options()
+
+        def start(item):
+            node, user_id = item
+            session = node.start_session(user_id, options=options)
+            return session if session is not None else ADSError(f"启动浏览器实例 {user_id} 失败")
+
+        items = [(node, user_id) for node, ids in groups.items() for user_id in ids]
+        with closing(_stream_results(start, items, concurrency * max(len(groups), 1))) as results:
+            for (_, user_id), result in results:
+                yield user_id, result
+
+    def stop_browser(self, user_id):
+        """
+        停止浏览器实例,参数和返回值见 ADS.stop_browser。
+        """
+        node = self._owner(user_id)
+        return node.stop_browser(user_id) if node is not None else False
+
+    def check_start_status(self, user_id, timeout=15):
+        """
+        检查浏览器实例是否处于活动状态,参数和返回值见 ADS.check_start_status。
+        """
+        node = self._owner(user_id)
+        return node.check_start_status(user_id, timeout) if node is not None else False
+
+    def wait_until_active(self, user_ids, timeout=30, poll_strategy=None, probe_debug_port=False):
+        """
+        等待多个浏览器实例进入活动状态,各节点并行等待,参数和返回值见 ADS.wait_until_active。
+        """
+        groups, missing = self._group_by_owner(user_ids)
+        results = dict.fromkeys(missing)
+        for node, result in self._map_nodes(
+                lambda node, ids: node.wait_until_active(ids, timeout, poll_strategy, probe_debug_port), groups):
+            results.update(dict.fromkeys(groups[node]) if isinstance(result, Exception) else result)
+        return results
+
+    def run_fleet(self, user_ids, job_fn, **kwargs):
+        """
+        在多个浏览器用户上运行同一个任务,每个节点各自运行 ADS.run_fleet,结果合并后按完成顺序产出。
+
+        max_concurrent、max_live 等参数对每个节点分别生效,参数含义见 ADS.run_fleet。
+
+        Yields:
+            tuple: (user_id, 结果),结果为 job_fn 的返回值,失败时为异常对象。
+        """
+        groups, missing = self._group_by_owner(user_ids)
+        for user_id in missing:
+            yield user_id, ADSError(f"在所有节点上都找不到浏览器用户 {user_id}")
+        if not groups:
+            return
+
+        results = queue.Queue()
+        stop = threading.Event()
+
+        def drain(node, ids):
+            fleet = node.run_fleet(ids, job_fn, **kwargs)
+            try:
+                for item in fleet:
+                    results.put(item)
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                for user_id in ids:
+                    results.put((user_id, e))
+            finally:
+                fleet.close()  # 提前结束时取消该节点尚未开始的浏览器用户,并等待已启动的浏览器停止
+                results.put(None)
+
+        threads = [threading.Thread(target=drain, args=(node, ids), daemon=True) for node, ids in groups.items()]
+        for thread in threads:
+            thread.start()
+        try:
+            running = len(threads)
+            while running:
+                item = results.get()
+                if item is None:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def stop_all(self, user_ids=None, concurrency=8, timeout=30, poll_strategy=None):
+        """
+        在所有节点上并行停止浏览器实例,参数和返回值见 ADS.stop_all。user_ids 为 None 时停止每个节点上所有已打开的浏览器。
+        """
+        if user_ids is None:
+            items = dict.fromkeys(self.nodes)
+        else:
+            items, missing = self._group_by_owner(user_ids)
+        results = {} if user_ids is None else dict.fromkeys(missing, False)
+        for node, result in self._map_nodes(
+                lambda node, ids: node.stop_all(ids, concurrency, timeout, poll_strategy), items):
+            if isinstance(result, Exception):
+                logger.error("在节点 %s 上停止浏览器实例时发生异常: %s", node.matrix, result)
+                results.update(dict.fromkeys(items[node] or (), False))
+            else:
+                results.update(result)
+        return results
+
+    def _seed_count(self, node):
+        """
+        不发起请求地估计节点上的浏览器用户数量。必须在持有 self._lock 时调用。
+
+        Args:
+            node (ADS): 节点。
+
+        Returns:
+            int: 节点有 profile_store 时为其中的数量,否则为本集群已知在该节点上的浏览器用户数量。
+        """
+        if node.profile_store is not None:
+            return len(node.profile_store)
+        return sum(1 for owner in self._owners.values() if owner is node)
+
+    def _least_loaded(self):
+        """
+        选出浏览器用户最少的节点,并预先把它的数量加一。
+
+        数量在第一次调用时由 _seed_count 估计,不会为了计数列出所有节点的全部浏览器用户;调用过 list_profiles 后为准确值。
+
+        Returns:
+            ADS: 节点。
+        """
+        with self._lock:
+            if self._counts is None:
+                self._counts = {node: self._seed_count(node) for node in self.nodes}
+            node = min(self.nodes, key=lambda node: self._counts[node])
+            self._counts[node] += 1
+            return node
+
+    def create(self, name, *args, **kwargs):
+        """
+        在浏览器用户最少的节点上创建浏览器用户,参数和返回值见 ADS.create。
+
+        组 ID 只在各自的节点上有效,不指定 group_id 时使用所选节点的默认组。
+        """
+        node = self._least_loaded()
+        try:
+            user_id = node.create(name, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._counts[node] -= 1
+            raise
+        if user_id:
+            self._remember(node, [user_id])
+        else:
+            with self._lock:
+                self._counts[node] -= 1
+        return user_id
+
+    def create_many(self, specs, concurrency=4):
+        """
+        批量创建浏览器用户,每个描述放在当时浏览器用户最少的节点上,各节点并行提交。
+
+        Args:
+            specs (iterable): 浏览器用户描述,格式见 ADS.create_many。
+            concurrency (int, optional): 每个节点同时进行中的创建请求数。默认为 4。
+
+        Yields:
+            tuple: (spec, 结果),结果为新浏览器用户的 ID,失败时为异常对象。
+        """
+        def submit(item):
+            node, spec = item
+            try:
+                user_id = node._submit_create(node._spec_payload(spec))
+            except Exception:
+                with self._lock:
+                    self._counts[node] -= 1
+                raise
+            if user_id is None:
+                with self._lock:
+                    self._counts[node] -= 1
+                return ADSError(f"创建浏览器用户 {spec.get('name')} 失败")
+            self._remember(node, [user_id])
+            return user_id
+
+        # _stream_results 会先取完所有描述再等待结果,因此节点在创建开始前就依次选好;每次选择都预先把所选节点的
+        # 数量加一,各节点仍然均衡,创建失败时再减回
+        items = ((self._least_loaded(), spec) for spec in specs)
+        with closing(_stream_results(submit, items, concurrency * len(self.nodes))) as results:
+            for (_, spec), result in results:
+                yield spec, result
+
+    def list_profiles(self, group_id=None):
+        """
+        并行获取所有节点上的浏览器用户,参数见 ADS.list_profiles。
+
+        Returns:
+            ProfileIndex: 所有节点的浏览器用户。
+
+        Raises:
+            ADSError: 任一节点获取失败。
+            requests.exceptions.RequestException: 任一节点请求异常。
+        """
+        profiles = []
+        counts = {}
+        for node, result in self._map_nodes(lambda node: node.list_profiles(group_id)):
+            if isinstance(result, Exception):
+                raise result
+            self._remember(node, (profile.user_id for profile in result))
+            counts[node] = len(result)
+            profiles.extend(result)
+        if group_id is None:
+            with self._lock:
+                self._counts = counts
+        return ProfileIndex(profiles)
+
+    def get_browser(self, browser_list):
+        """
+        获取所有节点上的浏览器实例列表,参数和返回值见 ADS.get_browser。
+        """
+        try:
+            profiles = self.list_profiles()
+        except (ADSError, requests.exceptions.RequestException) as e:
+            logger.error("获取浏览器实例列表失败: %s", e)
+            return False
+        browser_list.clear()
+        browser_list.extend(_browser_info(profile) for profile in profiles)
+        return True
+
+    def list_groups(self):
+        """
+        并行获取所有节点上的分组,同名同 ID 的分组只保留一个。组 ID 只在各自的节点上有效。
+
+        Returns:
+            list: Group 对象。
+        """
+        groups = {}
+        for node, result in self._map_nodes(lambda node: node.list_groups()):
+            if isinstance(result, Exception):
+                raise result
+            for group in result:
+                groups.setdefault((group.group_id, group.group_name), group)
+        return list(groups.values())
+
+    def get_group(self, group_list):
+        """
+        获取所有节点上的分组,参数和返回值见 ADS.get_group。
+        """
+        try:
+            groups = self.list_groups()
+        except (ADSError, requests.exceptions.RequestException) as e:
+            logger.error("获取分组列表失败: %s", e)
+            return False
+        group_list.clear()
+        group_list.extend(group.to_dict() for group in groups)
+        return True
+
+    def get_profile(self, user_id):
+        """
+        获取浏览器用户,参数和返回值见 ADS.get_profile。
+        """
+        node = self._owner(user_id)
+        return node.get_profile(user_id) if node is not None else None
+
+    def get_info(self, user_id):
+        """
+        获取浏览器用户信息,参数和返回值见 ADS.get_info。
+        """
+        node = self._owner(user_id)
+        return node.get_info(user_id) if node is not None else None
+
+    def del_browser(self, user_id):
+        """
+        删除浏览器用户,参数和返回值见 ADS.del_browser。
+        """
+        node = self._owner(user_id)
+        if node is None or not node.del_browser(user_id):
+            return False
+        self._forget(node, [user_id])
+        return True
+
+    def del_browsers(self, user_ids, chunk_size=100):
+        """
+        批量删除浏览器用户,各节点并行,参数和返回值见 ADS.del_browsers。
+        """
+        groups, missing = self._group_by_owner(user_ids)
+        results = dict.fromkeys(missing, False)
+        for node, result in self._map_nodes(lambda node, ids: node.del_browsers(ids, chunk_size), groups):
+            if isinstance(result, Exception):
+                logger.error("在节点 %s 上批量删除浏览器用户时发生异常: %s", node.matrix, result)
+                results.update(dict.fromkeys(groups[node], False))
+                continue
+            results.update(result)
+            self._forget(node, [user_id for user_id, deleted in result.items() if deleted])
+        return results
+
+
+class AsyncADS:
+    def __init__(self, matrix, group_id=None, rate_limits=None, retry_policy=None, pool_size=100, timeout=DEFAULT_TIMEOUT,
+                 metrics=None, hooks=None):
+        """
+        初始化 AsyncADS 类,即基于 asyncio 和 aiohttp 的 ADS。
+
+        构造时不发起任何网络请求,连接池在第一次请求时于当前事件循环中创建。
 
         Args:
             matrix (str): 矩阵 API 的 URL。
+            group_id (str, optional): 默认组 ID。默认为 None,在第一次创建浏览器用户时获取或创建。
+            rate_limits (dict, optional): 按端点的限流配置,格式见 DEFAULT_RATE_LIMITS。默认为 None,使用默认配置。
+            retry_policy (RetryPolicy, optional): 重试策略,与 ADS 共用。默认为 None,使用 RetryPolicy()。
+            pool_size (int, optional): 连接池的最大连接数。默认为 100。
+            timeout (float or tuple, optional): 默认的 (连接超时, 读取超时) 秒数。默认为 DEFAULT_TIMEOUT。
+            metrics (MetricsSink, optional): 指标接收器,与 ADS 记录相同的指标(没有锁等待)。默认为 None,不记录指标。
+            hooks (dict, optional): 请求钩子,格式见 ADS;response 钩子收到的 response 为解析后的响应数据。默认为 None。
         """
+        if aiohttp is None:
+            raise ImportError("AsyncADS 需要 aiohttp,请先执行 pip install aiohttp")
         self.matrix = matrix
-        self.lock = threading.Lock()  # 创建一个互斥锁
-        self.group_id = self.get_or_create_groupid()
+        self._group_id = group_id
+        self._group_lock = asyncio.Lock()
+        self.rate_limiter = RateLimiter(rate_limits)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+        self.metrics = metrics or MetricsSink()
+        self.hooks = {"request": list((hooks or {}).get("request", [])),
+                      "response": list((hooks or {}).get("response", []))}
 
-    def start_browser(self, user_id, open_tabs=0, ip_tab=1, new_first_tab=0, launch_args="", headless=0, disable_password_filling=0,
-                    clear_cache_after_closing=0, enable_password_saving=0):
+    async def close(self):
         """
-        启动一个新的浏览器实例。
+        关闭连接池中的所有连接。
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _client_timeout(self, timeout):
+        """
+        把 (连接超时, 读取超时) 转换为 aiohttp.ClientTimeout。
 
         Args:
-            user_id (str): 浏览器用户的 ID。
-            open_tabs (int, optional): 是否打开平台和历史页面,0 表示打开(默认),1 表示不打开。默认为 0。
-            ip_tab (int, optional): 是否打开 IP 检测页,0 表示不打开,1 表示打开(默认)。默认为 1。
-            new_first_tab (int, optional): 是否使用新版 IP 检测页,1 表示新版,0 表示旧版(默认)。默认为 0。
-            launch_args (str, optional): 启动浏览器时传递的额外参数。默认为空字符串。
-            headless (int, optional): 是否以无头模式启动浏览器,0 表示不启用(默认),1 表示启用。默认为 0。
-            disable_password_filling (int, optional): 是否禁用密码自动填充功能,0 表示不禁用(默认),1 表示禁用。默认为 0。
-            clear_cache_after_closing (int, optional): 是否在关闭浏览器后清除缓存,0 表示不清除(默认),1 表示清除。默认为 0。
-            enable_password_saving (int, optional): 是否允许保存密码,0 表示不允许(默认),1 表示允许。默认为 0。
+            timeout (float or tuple): 超时秒数。
 
         Returns:
-            tuple: 包含 WebDriver 路径和调试端口号的元组。如果启动失败,则返回 (None, None)。
+            aiohttp.ClientTimeout: aiohttp 的超时配置。
         """
-        with self.lock:
-            for attempt in range(5):  # 重复启动五次
-                time.sleep(3)  # 每次互斥 sleep 时间更改为 3 秒
-                url = f"{self.matrix}/api/v1/browser/start?user_id={user_id}"
-                if open_tabs == 1:
-                    url += f"&open_tabs={open_tabs}"
-                if ip_tab is not None:
-                    url += f"&ip_tab={ip_tab}"
-                if new_first_tab == 1:
-                    url += f"&new_first_tab={new_first_tab}"
-                if launch_args != "":
-                    url += f"&launch_args={launch_args}"
-                if headless == 1:
-                    url += f"&headless={headless}"
-                if disable_password_filling == 1:
-                    url += f"&disable_password_filling={disable_password_filling}"
-                if clear_cache_after_closing == 1:
-                    url += f"&clear_cache_after_closing={clear_cache_after_closing}"
-                if enable_password_saving == 1:
-                    url += f"&enable_password_saving={enable_password_saving}"
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
 
-                try:
-                    response = requests.get(url)
-                    data = response.json()
-                    print(data)
-
-                    if data["code"] == 0:
-                        webdriver = data["data"]["webdriver"]
-                        debug_port = data["data"]["ws"]["selenium"]
-                        return webdriver, debug_port
-                    else:
-                        print(f"第 {attempt+1} 次启动浏览器实例失败: {data['msg']}")
-                except requests.exceptions.RequestException as e:
-                    print(f"第 {attempt+1} 次启动浏览器实例时发生请求异常: {e}")
+    async def _request(self, method, endpoint, params=None, payload=None, timeout=None):
+        """
+        向 Local API 发送一次请求,配额不足时以 asyncio.sleep 等待,不会阻塞事件循环。
 
-                time.sleep(3)  # 启动失败后等待 3 秒再重试
+        Args:
+            method (str): "GET" 或 "POST"。
+            endpoint (str): 端点路径,可以带查询字符串,例如 "browser/active?user_id=xxx"。
+            params (dict, optional): 查询参数。默认为 None。
+            payload (dict, optional): POST 的 JSON 数据。默认为 None。
+            timeout (float or tuple, optional): 本次请求的超时秒数。默认为 None,使用 self.timeout。
 
-            print("启动浏览器实例失败,已尝试 5 次")
-            return None, None
+        Returns:
+            dict: 解析后的响应数据。
+        """
+        path = endpoint.split("?", 1)[0]
+        wait = self.rate_limiter.reserve(path)
+        if wait > 0:
+            self.metrics.observe("ads_rate_limit_wait_seconds", wait, {"endpoint": path})
+            await asyncio.sleep(wait)
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size),
+                                                 headers={"Content-type": "application/json"})
+        url = f"{self.matrix}/api/v1/{endpoint}"
+        client_timeout = self._client_timeout(self.timeout if timeout is None else timeout)
+        _run_hooks(self.hooks["request"], method, url, params, payload)
 
-    def stop_browser(self, user_id):
+        started = time.perf_counter()
+        status, data, error = "cancelled", None, None  # 协程被取消时既没有响应也没有异常
+        try:
+            body = _encode_payload(payload) if payload is not None else None
+            async with self.session.request(method, url, params=params, data=body, timeout=client_timeout) as response:
+                status = str(response.status)
+                data = await response.json(content_type=None)
+            return data
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            error = e
+            if status == "cancelled":
+                status = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.increment("ads_requests_total", labels={"endpoint": path, "status": status})
+            self.metrics.observe("ads_request_seconds", elapsed, {"endpoint": path})
+            logger.debug("%s %s -> %s (%.3fs)", method, url, status, elapsed)
+            _run_hooks(self.hooks["response"], method, url, data, elapsed, error)
+
+    def _connect_timeout(self):
         """
-        停止指定用户 ID 的浏览器实例。
+        返回默认超时中的连接超时部分。
+
+        Returns:
+            float: 连接超时秒数。
+        """
+        return self.timeout[0] if isinstance(self.timeout, tuple) else self.timeout
+
+    async def _with_retry(self, operation, action, attempt_fn):
+        """
+        按 self.retry_policy 重复执行 attempt_fn,等待使用 asyncio.sleep,参数含义见 ADS._with_retry。
 
         Args:
-            user_id (str): 浏览器用户的 ID。
+            operation (str): 操作名称,用作指标标签。
+            action (str): 操作描述,用于日志。
+            attempt_fn (callable): 返回协程的函数,协程结果为 (是否成功, 结果, 响应数据)。
 
         Returns:
-            bool: 如果停止成功,返回 True,否则返回 False。
+            成功时为 attempt_fn 返回的结果,否则为 None。
         """
-        with self.lock:
-            for attempt in range(5):  # 增加重试次数到 5 次
-                time.sleep(3)  # 增加等待时间到 3 秒
-                url = f"{self.matrix}/api/v1/browser/stop?user_id={user_id}"
-                try:
-                    response = requests.get(url)
-                    data = response.json()
-                    
-                    if data["code"] == 0:
-                        print(f"浏览器实例 {user_id} 停止成功")
-                        return True
-                    else:
-                        print(f"第 {attempt+1} 次停止浏览器实例 {user_id} 失败: {data['msg']}")
-                except requests.exceptions.RequestException as e:
-                    print(f"第 {attempt+1} 次停止浏览器实例 {user_id} 时发生请求异常: {e}")
+        policy = self.retry_policy
+        deadline = time.monotonic() + policy.deadline
+        for attempt in range(policy.max_attempts):
+            try:
+                ok, result, data = await attempt_fn()
+                if ok:
+                    self.metrics.increment("ads_operations_total", labels={"operation": operation, "result": "ok"})
+                    return result
+                kind = policy.classify(data=data)
+                self.metrics.increment("ads_api_errors_total", labels={
+                    "endpoint": OPERATION_ENDPOINTS.get(operation, operation), "code": str(data.get("code"))})
+                logger.warning("第 %d 次%s 失败: %s", attempt + 1, action, data.get("msg"))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                kind = policy.classify(error=e)
+                logger.warning("第 %d 次%s 时发生请求异常: %s", attempt + 1, action, e)
+            self.metrics.increment("ads_failures_total", labels={"operation": operation, "kind": kind})
 
-                time.sleep(3)  # 停止失败后等待 3 秒再重试
+            if kind == FATAL:
+                logger.error("%s 遇到不可重试的错误,不再重试", action)
+                break
+            delay = policy.delay(attempt, kind)
+            if attempt + 1 >= policy.max_attempts or time.monotonic() + delay > deadline:
+                logger.error("%s 失败,已尝试 %d 次", action, attempt + 1)
+                break
+            self.metrics.increment("ads_retries_total", labels={"operation": operation})
+            await asyncio.sleep(delay)
 
-            print(f"停止浏览器实例 {user_id} 失败,已尝试 5 次")
-            return False
+        self.metrics.increment("ads_operations_total", labels={"operation": operation, "result": "failed"})
+        return None
 
-    def check_start_status(self, user_id):
+    @property
+    def group_id(self):
         """
-        检查指定用户 ID 的浏览器实例是否处于活动状态。
+        str: 已获取的默认组 ID,尚未获取时为 None。
+        """
+        return self._group_id
+
+    async def _default_group_id(self):
+        """
+        获取默认组 ID。与 ADS.group_id 相同,加锁后再检查一次,并发的 create 只会获取或创建一次分组。
+
+        Returns:
+            str: 组 ID,如果获取或创建失败则返回 "0",下次调用会重试。
+        """
+        if self._group_id is None:
+            async with self._group_lock:
+                if self._group_id is None:
+                    return await self.get_or_create_groupid()
+        return self._group_id
+
+    async def start_browser(self, user_id, open_tabs=0, ip_tab=1, new_first_tab=0, launch_args="", headless=0, disable_password_filling=0,
+                            clear_cache_after_closing=0, enable_password_saving=0, options=None):
+        """
+        启动一个新的浏览器实例,参数含义见 ADS.start_browser。
+
+        Returns:
+            tuple: 包含 WebDriver 路径和调试端口号的元组。如果启动失败,则返回 (None, None)。
+        """
+        session = await self.start_session(user_id, open_tabs, ip_tab, new_first_tab, launch_args, headless,
+                                           disable_password_filling, clear_cache_after_closing, enable_password_saving,
+                                           options)
+        return (session.webdriver, session.debug_port) if session is not None else (None, None)
+
+    async def start_session(self, user_id, open_tabs=0, ip_tab=1, new_first_tab=0, launch_args="", headless=0,
+                            disable_password_filling=0, clear_cache_after_closing=0, enable_password_saving=0, options=None):
+        """
+        启动一个新的浏览器实例,参数含义见 ADS.start_browser。
+
+        Returns:
+            BrowserSession: 已启动的浏览器实例,如果启动失败则返回 None。
+
+        Raises:
+            ValueError: 启动参数不合法。
+        """
+        if options is None:
+            options = _launch_options(open_tabs, ip_tab, new_first_tab,
+                                      tuple(launch_args) if isinstance(launch_args, list) else launch_args, headless,
+                                      disable_password_filling, clear_cache_after_closing, enable_password_saving)
+        endpoint = options.endpoint(user_id)
+
+        async def attempt():
+            data = await self._request("GET", endpoint)
+            logger.debug("启动浏览器实例 %s 的响应: %s", user_id, data)
+            if data["code"] == 0:
+                return True, BrowserSession.from_api(user_id, data["data"]), data
+            return False, None, data
+
+        return await self._with_retry("start_browser", f"启动浏览器实例 {user_id}", attempt)
+
+    async def stop_browser(self, user_id):
+        """
+        停止指定用户 ID 的浏览器实例。
 
         Args:
             user_id (str): 浏览器用户的 ID。
 
         Returns:
-            bool: 如果浏览器实例处于活动状态,返回 True,否则返回 False。
+            bool: 如果停止成功,返回 True,否则返回 False。
         """
-        with self.lock:
-            for attempt in range(5):  # 循环检查五次
-                time.sleep(3)  # 延时3秒
-                url = f"{self.matrix}/api/v1/browser/active?user_id={user_id}"
-                try:
-                    response = requests.get(url)
-                    data = response.json()
-
-                    if data["code"] == 0 and data["data"]["status"] == "Active":
-                        return True
-                    else:
-                        print(f"第 {attempt+1} 次检查,浏览器实例未处于活动状态")
-                except requests.exceptions.RequestException as e:
-                    print(f"第 {attempt+1} 次检查,发生请求异常: {e}")
+        async def attempt():
+            data = await self._request("GET", f"browser/stop?user_id={user_id}")
+            return data["code"] == 0, True, data
 
-            return False
+        if await self._with_retry("stop_browser", f"停止浏览器实例 {user_id}", attempt):
+            logger.info("浏览器实例 %s 停止成功", user_id)
+            return True
+        return False
 
-    def create(self, name, is_proxy=False, proxy_type="", proxy_host="", proxy_port="", proxy_user="", proxy_password="", group_id="", cookies=None):
+    async def check_start_status(self, user_id, timeout=15, poll_strategy=None):
         """
-        创建一个新的浏览器用户。
+        检查指定用户 ID 的浏览器实例是否处于活动状态,未就绪时按 poll_strategy 自适应轮询直到超时。
 
         Args:
-            name (str): 浏览器用户的名称。
-            is_proxy (bool, optional): 是否使用代理。默认为 False。
-            proxy_type (str, optional): 代理类型。默认为空字符串。
-            proxy_host (str, optional): 代理主机。默认为空字符串。
-            proxy_port (str, optional): 代理端口。默认为空字符串。
-            proxy_user (str, optional): 代理用户名。默认为空字符串。
-            proxy_password (str, optional): 代理密码。默认为空字符串。
-            group_id (str, optional): 组 ID。默认为空字符串。
-            cookies (str, optional): Cookie 字符串。默认为 None。
+            user_id (str): 浏览器用户的 ID。
+            timeout (float, optional): 最长等待秒数。默认为 15。
+            poll_strategy (PollStrategy, optional): 轮询策略。默认为 None,使用 PollStrategy()。
 
         Returns:
-            str: 新创建的浏览器用户的 ID,如果创建失败则返回空字符串。
+            bool: 如果浏览器实例处于活动状态,返回 True,否则返回 False。
         """
-        with self.lock:
-            for attempt in range(5):  # 重复创建五次
-                time.sleep(3)  # 每次互斥 sleep 时间更改为 3 秒
-                url = f"{self.matrix}/api/v1/user/create"
-                payload = {
-                    "name": name,
-                    "group_id": group_id if group_id else self.group_id,
-                    "fingerprint_config": {
-                        "webrtc": "proxy"
-                    }
-                }
-
-                if cookies:
-                    payload["cookie"] = cookies
-
-                if is_proxy:
-                    payload["user_proxy_config"] = {
-                        "proxy_soft": "other",
-                        "proxy_type": proxy_type,
-                        "proxy_host": proxy_host,
-                        "proxy_port": int(proxy_port),
-                        "proxy_user": proxy_user,
-                        "proxy_password": proxy_password
-                    }
+        poll_strategy = poll_strategy or PollStrategy()
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            try:
+                data = await self._request("GET", f"browser/active?user_id={user_id}")
+
+                if data["code"] == 0 and data["data"]["status"] == "Active":
+                    return True
                 else:
-                    payload["user_proxy_config"] = {
-                        "proxy_soft": "no_proxy"
-                    }
+                    logger.debug("第 %d 次检查,浏览器实例 %s 未处于活动状态", attempt + 1, user_id)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("第 %d 次检查,发生请求异常: %s", attempt + 1, e)
 
-                ret = requests.post(url, json=payload, headers={"Content-type": "application/json"}, timeout=60).text
-                print(ret)
-                data = json.loads(ret)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(remaining, poll_strategy.delay(attempt)))
+            attempt += 1
 
-                if data["msg"] == "Success":
-                    print(f"创建浏览器成功,初始数据{ret}")
-                    print(data["data"]["id"])
-                    return data["data"]["id"]
+    async def create(self, name, is_proxy=False, proxy_type="", proxy_host="", proxy_port="", proxy_user="", proxy_password="", group_id="", cookies=None):
+        """
+        创建一个新的浏览器用户,参数含义见 ADS.create。
 
-                print(f"创建失败:{ret}")
-                time.sleep(3)  # 创建失败后等待 3 秒再重试
+        Returns:
+            str: 新创建的浏览器用户的 ID,如果创建失败则返回 None。
+        """
+        if not group_id:
+            group_id = await self._default_group_id()
+        proxy = (proxy_type, proxy_host, proxy_port, proxy_user, proxy_password) if is_proxy else None
+        payload = _create_payload(name, proxy, group_id, cookies)
 
-            print(f"创建浏览器用户失败,已尝试 5 次")
-            return None
+        async def attempt():
+            data = await self._request("POST", "user/create", payload=payload, timeout=(self._connect_timeout(), 60))
+            logger.debug("创建浏览器用户 %s 的响应: %s", payload["name"], data)
+            if data["msg"] == "Success":
+                return True, data["data"]["id"], data
+            return False, None, data
 
+        user_id = await self._with_retry("create", f"创建浏览器用户 {payload['name']}", attempt)
+        if user_id is not None:
+            logger.info("创建浏览器成功: %s", user_id)
+        return user_id
 
-    def get_or_create_groupid(self):
+    async def get_or_create_groupid(self):
         """
-        获取或创建一个组 ID。
+        获取或创建一个组 ID,结果会被缓存在实例上。
 
         Returns:
             str: 组 ID,如果获取或创建失败则返回 "0"。
         """
-        with self.lock:
-            time.sleep(1.5)
-            url = f"{self.matrix}/api/v1/group/list"
-            ret = requests.get(url).text
-            data = json.loads(ret)
-            if data["code"] == 0 and len(data["data"]["list"]) > 0:
-                return data["data"]["list"][0]["group_id"]
-            else:
-                url = f"{self.matrix}/api/v1/group/create"
-                payload = {
-                    "group_name": "default_group"
-                }
-                ret = requests.post(url, json=payload, headers={"Content-type": "application/json"}).text
-                data = json.loads(ret)
-                if data["code"] == 0:
-                    return data["data"]["group_id"]
-            return "0"
+        data = await self._request("GET", "group/list")
+        if data["code"] == 0 and len(data["data"]["list"]) > 0:
+            self._group_id = data["data"]["list"][0]["group_id"]
+            return self._group_id
+        data = await self._request("POST", "group/create", payload={"group_name": "default_group"})
+        if data["code"] == 0:
+            self._group_id = data["data"]["group_id"]
+            return self._group_id
+        return "0"
 
-    def get_browser(self, browser_list):
+    async def _fetch_profile_page(self, page, page_size, group_id):
+        """
+        获取 user/list 的一页数据。
+
+        Returns:
+            list: 本页的浏览器用户记录。
+
+        Raises:
+            ADSError: Local API 返回失败。
+        """
+        data = await self._request("GET", "user/list", params=_profile_page_params(page, page_size, group_id))
+        if data["code"] != 0:
+            raise ADSError(f"获取第 {page} 页浏览器用户失败: {data['msg']}")
+        return data["data"]["list"]
+
+    async def iter_profiles(self, page_size=100, group_id=None, prefetch=1):
+        """
+        逐页遍历所有浏览器用户,边获取边产出,参数含义见 ADS.iter_profiles。
+
+        预取通过提前创建后续页面的 Task 实现:除正在等待的页面外最多提前请求 prefetch 页,已经取到不足 page_size 条的
+        页面后不再请求之后的页面。遍历结束时未用到的 Task 会被取消。
+
+        Yields:
+            dict: user/list 返回的原始浏览器用户记录。
+        """
+        pending = deque()
+        next_page = 1
+        last_page = None  # 已知的最后一页,即返回不足 page_size 条的页码
+
+        def note_last(task, page):
+            nonlocal last_page
+            if not task.cancelled() and task.exception() is None and len(task.result()) < page_size:
+                last_page = page if last_page is None else min(last_page, page)
+
+        try:
+            while True:
+                while len(pending) < max(1, prefetch + 1) and (last_page is None or next_page <= last_page):
+                    task = asyncio.ensure_future(self._fetch_profile_page(next_page, page_size, group_id))
+                    task.add_done_callback(partial(note_last, page=next_page))
+                    pending.append(task)
+                    next_page += 1
+                items = await pending.popleft()
+                for item in items:
+                    yield item
+                if len(items) < page_size:
+                    return
+        finally:
+            for task in pending:
+                if task.done() and not task.cancelled():
+                    task.exception()  # 取走预取页面的异常,避免 "Task exception was never retrieved" 警告
+                else:
+                    task.cancel()
+
+    async def get_browser(self, browser_list):
         """
         获取所有浏览器实例的列表。
 
@@ -230,64 +4627,59 @@ class ADS:
         Returns:
             bool: 如果获取成功,返回 True,否则返回 False。
         """
-        with self.lock:
-            time.sleep(1.5)
-            url = f"{self.matrix}/api/v1/user/list?page=1&page_size=100"
-            ret = requests.get(url).text
-            browser_list.clear()
-
-            if json.loads(ret):
-                data = json.loads(ret)["data"]["list"]
-                for i in range(len(data)):
-                    browser_info = {
-                        "id": data[i]["user_id"],
-                        "name": data[i]["name"],
-                        "user": data[i]["username"]
-                    }
-                    browser_list.append(browser_info)
-                return True
+        try:
+            profiles = await self.list_profiles()
+        except (ADSError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("获取浏览器实例列表失败: %s", e)
             return False
 
-    def del_browser(self, user_id):
-        with self.lock:
-            for attempt in range(5):  # 重复删除五次
-                time.sleep(3)  # 每次互斥 sleep 时间更改为 3 秒
-                url = f"{self.matrix}/api/v1/user/delete"
-                payload = {
-                    "user_ids": [user_id]
-                }
-                headers = {
-                    "Content-type": "application/json"
-                }
+        browser_list.clear()
+        browser_list.extend(_browser_info(profile) for profile in profiles)
+        return True
 
-                try:
-                    response = requests.post(url, json=payload, headers=headers)
-                    print(f"尝试删除浏览器{response.text}")
-
-                    if response.json().get("code") == 0:
-                        print(f"删除成功: {user_id}")
-
-                        # 交叉验证删除是否成功
-                        url = f"{self.matrix}/api/v1/user/list?user_id={user_id}"
-                        response = requests.get(url, headers={"Content-type": "application/json"})
-
-                        if response.json().get("code") == 0 and len(response.json().get("data", {}).get("list", [])) == 0:
-                            print(f"交叉验证通过,浏览器用户 {user_id} 已成功删除")
-                            return True
-                        else:
-                            print(f"交叉验证失败,浏览器用户 {user_id} 可能未被删除")
-                            time.sleep(3)  # 交叉验证失败后等待 3 秒再重试
-                    else:
-                        print(f"删除失败: {response.json().get('msg')}")
-                        time.sleep(3)  # 删除失败后等待 3 秒再重试
-                except requests.exceptions.RequestException as e:
-                    print(f"删除浏览器用户时发生异常: {e}")
-                    time.sleep(3)  # 发生异常后等待 3 秒再重试
+    async def list_profiles(self, group_id=None):
+        """
+        获取所有浏览器用户。
 
-            print(f"删除浏览器用户失败,已尝试 5 次")
-            return False
+        Args:
+            group_id (str, optional): 只获取指定组。默认为 None,获取全部。
 
-    def get_group(self, group_list):
+        Returns:
+            ProfileIndex: 按 ID 和名称建立索引的浏览器用户集合。
+
+        Raises:
+            ADSError: Local API 返回失败。
+        """
+        return ProfileIndex([Profile.from_api(item) async for item in self.iter_profiles(group_id=group_id)])
+
+    async def del_browser(self, user_id):
+        """
+        删除指定用户 ID 的浏览器用户,并通过 user/list 交叉验证。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            bool: 如果删除成功,返回 True,否则返回 False。
+        """
+        async def attempt():
+            data = await self._request("POST", "user/delete", payload={"user_ids": [user_id]})
+            logger.debug("尝试删除浏览器用户 %s 的响应: %s", user_id, data)
+            if data.get("code") != 0:
+                return False, None, data
+
+            # 交叉验证删除是否成功
+            data = await self._request("GET", f"user/list?user_id={user_id}")
+            if data.get("code") == 0 and len(data.get("data", {}).get("list", [])) == 0:
+                return True, True, data
+            return False, None, {"msg": f"交叉验证失败,浏览器用户 {user_id} 可能未被删除"}
+
+        if await self._with_retry("del_browser", f"删除浏览器用户 {user_id}", attempt):
+            logger.info("交叉验证通过,浏览器用户 %s 已成功删除", user_id)
+            return True
+        return False
+
+    async def get_group(self, group_list):
         """
         获取组列表。
         Args:
@@ -295,40 +4687,35 @@ class ADS:
         Returns:
             bool: 如果获取成功,返回 True,否则返回 False。
         """
-        with self.lock:
-            time.sleep(1.5)
-            url = f"{self.matrix}/api/v1/group/list"
-            
-            # 设置查询参数，默认查询所有分组，每页2000条数据
-            query_params = {
-                "page": 1,
-                "page_size": 2000
-            }
-            
-            try:
-                response = requests.get(url, params=query_params, headers={"Content-type": "application/json"})
-                ret = response.text
-                data = json.loads(ret)
-                
-                if data["code"] == 0:
-                    group_list.clear()
-                    for item in data["data"]["list"]:
-                        group_info = {
-                            "group_id": item["group_id"],
-                            "group_name": item["group_name"],
-                            "remark": item.get("remark", "")  # 备注字段可能存在也可能不存在
-                        }
-                        group_list.append(group_info)
-                    
-                    return True
-                else:
-                    print(f"获取分组失败: {data['msg']}")
-                    return False
-            except requests.exceptions.RequestException as e:
-                print(f"获取分组列表时发生请求异常: {e}")
-                return False
+        try:
+            groups = await self.list_groups()
+        except ADSError as e:
+            logger.error("%s", e)
+            return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("获取分组列表时发生请求异常: %s", e)
+            return False
 
-    def get_info(self, user_id):
+        group_list.clear()
+        group_list.extend(group.to_dict() for group in groups)
+        return True
+
+    async def list_groups(self):
+        """
+        获取所有分组。
+
+        Returns:
+            list: Group 对象。
+
+        Raises:
+            ADSError: Local API 返回失败。
+        """
+        data = await self._request("GET", "group/list", params={"page": 1, "page_size": 2000})
+        if data["code"] != 0:
+            raise ADSError(f"获取分组失败: {data['msg']}")
+        return [Group.from_api(item) for item in data["data"]["list"]]
+
+    async def get_info(self, user_id):
         """
         获取指定用户 ID 的浏览器实例信息。
 
@@ -336,13 +4723,27 @@ class ADS:
             user_id (str): 浏览器用户的 ID。
 
         Returns:
-            None
+            dict: user/list 返回的浏览器用户记录,如果不存在或获取失败则返回 None。
         """
-        with self.lock:
-            time.sleep(1.5)
-            url = f"{self.matrix}/api/v1/user/list?user_id={user_id}"
-            ret = requests.get(url, headers={"Content-type": "application/json"}).text
-            print(ret)
-            if json.loads(ret):
-                # 这里原易语言代码没有实现具体的逻辑,需要根据实际需求补充
-                pass
\ No newline at end of file
+        profile = await self.get_profile(user_id)
+        return profile.to_dict() if profile is not None else None
+
+    async def get_profile(self, user_id):
+        """
+        获取指定用户 ID 的浏览器用户。
+
+        Args:
+            user_id (str): 浏览器用户的 ID。
+
+        Returns:
+            Profile: 浏览器用户,如果不存在或获取失败则返回 None。
+        """
+        try:
+            data = await self._request("GET", f"user/list?user_id={user_id}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning("获取浏览器用户 %s 的信息时发生请求异常: %s", user_id, e)
+            return None
+        if data.get("code") != 0 or not data["data"]["list"]:
+            logger.warning("获取浏览器用户 %s 的信息失败: %s", user_id, data.get("msg"))
+            return None
+        return Profile.from_api(data["data"]["list"][0])
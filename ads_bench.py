@@ -0,0 +1,314 @@
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from ads_simulator import AdsPowerSimulator
+
+
+def load_ads(path=None):
+    """
+    加载 ADS 模块。模块文件名中带有 ".",不能直接 import,因此按路径加载。
+
+    Args:
+        path (str, optional): 模块文件路径。默认为 None,使用同目录下的 ads.English.py。
+
+    Returns:
+        module: 加载后的模块。
+    """
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "ads.English.py")
+    spec = importlib.util.spec_from_file_location("ads", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def global_lock_client(ads_module):
+    """
+    构造一个所有请求都经过同一把锁的 ADS 子类,用来和按端点类别/浏览器用户划分的并发控制做对比。
+
+    Args:
+        ads_module (module): load_ads 返回的模块。
+
+    Returns:
+        type: ADS 的子类。
+    """
+    class GlobalLockADS(ads_module.ADS):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._global_lock = threading.Lock()
+
+        def _request(self, *args, **kwargs):
+            with self._global_lock:
+                return super()._request(*args, **kwargs)
+
+    return GlobalLockADS
+
+
+def percentile(samples, fraction):
+    """
+    计算百分位数。
+
+    Args:
+        samples (list): 已排序的样本。
+        fraction (float): 0~1 之间的百分位。
+
+    Returns:
+        float: 百分位数,没有样本时为 0。
+    """
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+# 被测方法:每个函数接收 (ads, 浏览器用户 ID 列表, 调用序号),完成一次调用并返回结果
+OPERATIONS = {
+    "check_start_status": lambda ads, user_ids, i: ads.check_start_status(user_ids[i % len(user_ids)], timeout=0),
+    "get_info": lambda ads, user_ids, i: ads.get_info(user_ids[i % len(user_ids)]),
+    "get_group": lambda ads, user_ids, i: ads.get_group([]),
+    "start_browser": lambda ads, user_ids, i: ads.start_browser(user_ids[i % len(user_ids)]),
+    "stop_browser": lambda ads, user_ids, i: ads.stop_browser(user_ids[i % len(user_ids)]),
+    "create": lambda ads, user_ids, i: ads.create(f"bench-{i}"),
+    "del_browser": lambda ads, user_ids, i: ads.del_browser(user_ids[i % len(user_ids)]),
+    # 一半调用启动浏览器,一半只读查询分组:检查查询是否排在启动后面
+    "mixed": lambda ads, user_ids, i: (ads.start_browser(user_ids[i % len(user_ids)]) if i % 2 == 0
+                                       else ads.get_group([])),
+}
+
+# 返回值为空或 False 表示调用失败的方法。check_start_status 返回 False 只表示浏览器未启动,get_info 查不到时返回 None
+FALSY_IS_ERROR = {"get_group", "start_browser", "stop_browser", "create", "del_browser", "mixed"}
+
+
+def run_operation(ads, operation, user_ids, ops, threads):
+    """
+    用 threads 个线程调用 ops 次 operation,返回吞吐量和延迟分布。
+
+    Returns:
+        dict: 包含 ops_per_sec、p50、p99(毫秒)和 errors。
+    """
+    call = OPERATIONS[operation]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(i):
+        started = time.perf_counter()
+        try:
+            result = call(ads, user_ids, i)
+            failed = operation in FALSY_IS_ERROR and result in (False, None, (None, None))
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(ops)))
+    total = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "ops_per_sec": ops / total if total else 0.0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "errors": errors[0],
+    }
+
+
+def stress_test(ads_module, ops, threads, min_speedup):
+    """
+    压力测试:在模拟服务器上用启动浏览器与只读查询混合的负载对比 ADS 和单一全局锁的版本。
+
+    Args:
+        ads_module (module): load_ads 返回的模块。
+        ops (int): 每个客户端的调用次数。
+        threads (int): 线程数。
+        min_speedup (float): ADS 相对全局锁至少应达到的吞吐量倍数。
+
+    Returns:
+        bool: 达到 min_speedup 且没有失败时返回 True,否则返回 False。
+    """
+    simulator = AdsPowerSimulator(latency={"*": 0.01, "browser/start": 0.2}, profiles=threads).start()
+    results = {}
+    try:
+        for name, client_class in (("ADS", ads_module.ADS), ("全局锁", global_lock_client(ads_module))):
+            ads = client_class(simulator.url, rate_limits={}, cache_ttls={"groups": 0, "profiles": 0, "info": 0})
+            user_ids = []
+            ads.get_browser(user_ids)
+            results[name] = run_operation(ads, "mixed", [item["id"] for item in user_ids], ops, threads)
+            ads.close()
+    finally:
+        simulator.stop()
+
+    print(f"{'客户端':<8}{'线程':>6}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'失败':>6}")
+    for name, result in results.items():
+        print(f"{name:<8}{threads:>6}{result['ops_per_sec']:>10.1f}{result['p50']:>10.1f}"
+              f"{result['p99']:>10.1f}{result['errors']:>6}")
+    speedup = results["ADS"]["ops_per_sec"] / results["全局锁"]["ops_per_sec"]
+    passed = speedup >= min_speedup and not any(result["errors"] for result in results.values())
+    print(f"吞吐量提升 {speedup:.1f} 倍,要求至少 {min_speedup:.1f} 倍: {'通过' if passed else '未通过'}")
+    return passed
+
+
+def spawn_simulator(*args):
+    """
+    在子进程中启动模拟服务器,内存测试时避免把服务端的内存计入客户端。
+
+    Args:
+        *args: 传给 ads_simulator.py 的命令行参数。
+
+    Returns:
+        tuple: (子进程, URL)。
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ads_simulator.py")
+    process = subprocess.Popen([sys.executable, "-u", script, "--port", "0", *args], stdout=subprocess.PIPE, text=True)
+    url = process.stdout.readline().strip().split(": ", 1)[-1]
+    return process, url
+
+
+def write_cookie_file(path, size_kb):
+    """
+    写入一个约 size_kb KB 的 JSON 数组格式的 Cookie 文件。
+    """
+    cookies = []
+    size = 0
+    while size < size_kb * 1024:
+        cookie = {"domain": f".site{len(cookies) % 50}.example", "path": "/", "name": f"cookie{len(cookies)}",
+                  "value": "v" * 200, "expirationDate": 1900000000, "httpOnly": False, "secure": True}
+        cookies.append(cookie)
+        size += len(json.dumps(cookie))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cookies, f)
+
+
+def measure_create_memory(ads_module, url, cookie_path, creates, shared):
+    """
+    用 create_many 创建 creates 个带相同 Cookie 的浏览器用户,用 tracemalloc 记录客户端内存。
+
+    Args:
+        shared (bool): True 时所有浏览器用户共用一个 CookieJar;False 时每个浏览器用户各自读取一份 Cookie 字符串。
+
+    Returns:
+        dict: 包含 samples(每完成 1/5 时的当前内存,MB)、peak(峰值内存,MB)、seconds 和 errors。
+    """
+    ads = ads_module.ADS(url, rate_limits={}, cache_ttls={"groups": 0, "profiles": 0, "info": 0})
+    ads.group_id  # 预先获取默认组,不计入内存
+    tracemalloc.start()
+    started = time.perf_counter()
+    if shared:
+        jar = ads_module.CookieJar.load(cookie_path)
+        specs = ({"name": f"mem-{i}", "cookies": jar} for i in range(creates))
+    else:
+        def read(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        specs = ({"name": f"mem-{i}", "cookies": read(cookie_path)} for i in range(creates))
+
+    samples = []
+    errors = 0
+    for done, (_, result) in enumerate(ads.create_many(specs, concurrency=4), 1):
+        errors += isinstance(result, Exception)
+        if done % max(1, creates // 5) == 0:
+            samples.append(tracemalloc.get_traced_memory()[0] / 2 ** 20)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    seconds = time.perf_counter() - started
+    tracemalloc.stop()
+    ads.close()
+    return {"samples": samples, "peak": peak, "seconds": seconds, "errors": errors}
+
+
+def memory_benchmark(ads_module, url, creates, cookie_kb):
+    """
+    对比每个浏览器用户各自一份 Cookie 字符串与共用 CookieJar 时批量创建的内存占用。
+    """
+    process = None
+    if url is None:
+        process, url = spawn_simulator("--latency", "0.002")
+    cookie_path = os.path.join(tempfile.mkdtemp(), "cookies.json")
+    write_cookie_file(cookie_path, cookie_kb)
+    try:
+        print(f"{creates} 次创建,Cookie 文件 {os.path.getsize(cookie_path) / 1024:.0f} KB")
+        print(f"{'Cookie':<12}{'每 1/5 的内存 MB':<40}{'峰值 MB':>10}{'秒':>8}{'失败':>6}")
+        for name, shared in (("字符串", False), ("CookieJar", True)):
+            result = measure_create_memory(ads_module, url, cookie_path, creates, shared)
+            samples = " ".join(f"{value:.1f}" for value in result["samples"])
+            print(f"{name:<12}{samples:<40}{result['peak']:>10.1f}{result['seconds']:>8.1f}{result['errors']:>6}")
+    finally:
+        os.remove(cookie_path)
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ADS 吞吐量与延迟基准测试,默认在本地模拟服务器上运行")
+    parser.add_argument("--url", default=None, help="已有的 Local API 地址,不指定时启动内置模拟服务器")
+    parser.add_argument("--operations", default="check_start_status,get_info,get_group,start_browser,stop_browser",
+                        help="逗号分隔的被测方法: " + ",".join(OPERATIONS))
+    parser.add_argument("--threads", default="1,4,16", help="逗号分隔的线程数")
+    parser.add_argument("--ops", type=int, default=200, help="每组测试的调用次数")
+    parser.add_argument("--profiles", type=int, default=50, help="模拟服务器预先创建的浏览器用户数量")
+    parser.add_argument("--latency", type=float, default=0.01, help="模拟服务器查询类端点的延迟秒数")
+    parser.add_argument("--start-latency", type=float, default=0.2, help="模拟服务器 browser/start 的延迟秒数")
+    parser.add_argument("--rate-limit", action="store_true", help="启用客户端默认限流(默认关闭,只测客户端本身的开销)")
+    parser.add_argument("--compare-global-lock", action="store_true", help="同时测试单一全局锁的版本作为对照")
+    parser.add_argument("--stress", action="store_true",
+                        help="改为运行压力测试,吞吐量提升不足 --min-speedup 倍或有失败时以非零状态退出")
+    parser.add_argument("--min-speedup", type=float, default=2.0, help="压力测试要求的最低吞吐量提升倍数")
+    parser.add_argument("--memory", action="store_true", help="改为测试批量创建带 Cookie 的浏览器用户时的内存占用")
+    parser.add_argument("--creates", type=int, default=1000, help="内存测试的创建次数")
+    parser.add_argument("--cookie-kb", type=int, default=100, help="内存测试的 Cookie 文件大小(KB)")
+    args = parser.parse_args()
+
+    ads_module = load_ads()
+    if args.stress:
+        threads = max(int(value) for value in args.threads.split(","))
+        sys.exit(0 if stress_test(ads_module, args.ops, threads, args.min_speedup) else 1)
+    if args.memory:
+        memory_benchmark(ads_module, args.url, args.creates, args.cookie_kb)
+        return
+    simulator = None
+    if args.url is None:
+        simulator = AdsPowerSimulator(latency={"*": args.latency, "browser/stop": args.latency,
+                                               "browser/start": args.start_latency},
+                                      profiles=args.profiles).start()
+        url = simulator.url
+    else:
+        url = args.url
+
+    clients = [("ADS", ads_module.ADS)]
+    if args.compare_global_lock:
+        clients.append(("全局锁", global_lock_client(ads_module)))
+
+    options = {"cache_ttls": {"groups": 0, "profiles": 0, "info": 0}}
+    if not args.rate_limit:
+        options["rate_limits"] = {}
+
+    print(f"{'客户端':<8}{'方法':<20}{'线程':>6}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'失败':>6}")
+    try:
+        for name, client_class in clients:
+            for operation in args.operations.split(","):
+                for threads in (int(value) for value in args.threads.split(",")):
+                    ads = client_class(url, **options)
+                    user_ids = []
+                    ads.get_browser(user_ids)
+                    user_ids = [item["id"] for item in user_ids] or ["missing"]
+                    result = run_operation(ads, operation, user_ids, args.ops, threads)
+                    ads.close()
+                    print(f"{name:<8}{operation:<20}{threads:>6}{result['ops_per_sec']:>10.1f}"
+                          f"{result['p50']:>10.1f}{result['p99']:>10.1f}{result['errors']:>6}")
+    finally:
+        if simulator is not None:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 各端点的默认模拟延迟(秒)。启动浏览器在真实环境中最慢,查询类接口很快
+DEFAULT_LATENCY = {
+    "browser/start": 0.5,
+    "browser/stop": 0.1,
+    "*": 0.01,
+}
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # 客户端关闭 keep-alive 连接是正常现象,不打印堆栈
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class AdsPowerSimulator:
+    def __init__(self, host="127.0.0.1", port=0, latency=None, jitter=0.2, error_rate=0.0, rate_limit=None, profiles=0,
+                 seed=None, id_prefix="sim"):
+        """
+        初始化本地 AdsPower Local API 模拟服务器,用于在没有 AdsPower 的环境中测试和压测 ADS。
+
+        Args:
+            host (str, optional): 监听地址。默认为 "127.0.0.1"。
+            port (int, optional): 监听端口,0 表示随机端口。默认为 0。
+            latency (dict, optional): {端点: 延迟秒数},"*" 为其他端点的延迟。默认为 None,使用 DEFAULT_LATENCY。
+            jitter (float, optional): 延迟的随机抖动比例。默认为 0.2。
+            error_rate (float, optional): 随机返回 "Internal error" 的概率。默认为 0.0。
+            rate_limit (float, optional): 每秒允许的请求数,超过时返回 "Too many request per second"。默认为 None,不限制。
+            profiles (int, optional): 预先创建的浏览器用户数量。默认为 0。
+            seed (int, optional): 随机数种子。默认为 None。
+            id_prefix (str, optional): 浏览器用户 ID 的前缀,同时运行多个模拟服务器时用来区分。默认为 "sim"。
+        """
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.id_prefix = id_prefix
+        self.lock = threading.Lock()
+        self.groups = {"1": {"group_id": "1", "group_name": "default_group", "remark": ""}}
+        self.profiles = {}  # user_id -> 浏览器用户记录
+        self.active = {}  # user_id -> 活动浏览器信息
+        self.requests = 0
+        self._next_id = 1
+        self._window = (0, 0)  # (当前秒, 本秒请求数)
+        for i in range(profiles):
+            self._add_profile(f"profile-{i}", "1")
+        self.server = _QuietServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        str: 模拟服务器的 URL,可以直接作为 ADS 的 matrix 参数。
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        在后台线程中启动模拟服务器。
+
+        Returns:
+            AdsPowerSimulator: 自身,便于链式调用。
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止模拟服务器。
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _add_profile(self, name, group_id, proxy=None):
+        user_id = f"{self.id_prefix}{self._next_id:07d}"
+        self._next_id += 1
+        self.profiles[user_id] = {
+            "user_id": user_id,
+            "serial_number": str(self._next_id - 1),
+            "name": name,
+            "username": "",
+            "group_id": group_id,
+            "group_name": self.groups.get(group_id, {}).get("group_name", ""),
+            "domain_name": "",
+            "ip": "",
+            "ip_country": "",
+            "remark": "",
+            "created_time": str(int(time.time())),
+            "last_open_time": "",
+            "user_proxy_config": proxy or {"proxy_soft": "no_proxy"},
+        }
+        return user_id
+
+    def _throttled(self):
+        if self.rate_limit is None:
+            return False
+        second = int(time.monotonic())
+        with self.lock:
+            current, count = self._window
+            if current != second:
+                current, count = second, 0
+            count += 1
+            self._window = (current, count)
+            return count > self.rate_limit
+
+    def _sleep(self, endpoint):
+        delay = self.latency.get(endpoint, self.latency["*"])
+        if delay > 0:
+            time.sleep(delay * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def handle(self, endpoint, query, body):
+        """
+        处理一次请求并返回响应数据。
+
+        Args:
+            endpoint (str): 去掉 "/api/v1/" 前缀的端点路径,v2 端点保留 "v2/" 前缀。
+            query (dict): 查询参数。
+            body (dict): POST 的 JSON 数据。
+
+        Returns:
+            dict: 响应数据,未知端点返回 None。
+        """
+        handler = getattr(self, "_" + endpoint.replace("/", "_").replace("-", "_"), None)
+        if handler is None:
+            return None
+        with self.lock:
+            self.requests += 1
+        if self._throttled():
+            return {"code": -1, "msg": "Too many request per second, please check"}
+        self._sleep(endpoint)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return {"code": -1, "msg": "Internal error, please try again"}
+        with self.lock:
+            return handler(query, body)
+
+    def _ok(self, data=None):
+        return {"code": 0, "msg": "Success", "data": data if data is not None else {}}
+
+    def _missing(self, user_id):
+        return {"code": -1, "msg": f"user_id {user_id} is not exists"}
+
+    def _browser_start(self, query, body):
+        user_id = query.get("user_id", "")
+        if user_id not in self.profiles:
+            return self._missing(user_id)
+        if query.get("launch_args"):
+            try:
+                launch_args = json.loads(query["launch_args"])
+            except ValueError:
+                launch_args = None
+            if not isinstance(launch_args, list):
+                return {"code": -1, "msg": "launch_args is invalid"}
+        if user_id not in self.active:
+            port = 20000 + len(self.active) % 40000
+            self.active[user_id] = {
+                "user_id": user_id,
+                "ws": {"selenium": f"127.0.0.1:{port}", "puppeteer": f"ws://127.0.0.1:{port}/devtools/browser/{user_id}"},
+                "debug_port": str(port),
+                "webdriver": "/simulator/chromedriver",
+            }
+            self.profiles[user_id]["last_open_time"] = str(int(time.time()))
+        return self._ok(self.active[user_id])
+
+    def _browser_stop(self, query, body):
+        user_id = query.get("user_id", "")
+        if user_id not in self.profiles:
+            return self._missing(user_id)
+        self.active.pop(user_id, None)
+        return self._ok()
+
+    def _browser_active(self, query, body):
+        user_id = query.get("user_id", "")
+        if user_id not in self.profiles:
+            return self._missing(user_id)
+        if user_id in self.active:
+            return self._ok(dict(self.active[user_id], status="Active"))
+        return self._ok({"status": "Inactive"})
+
+    def _browser_local_active(self, query, body):
+        return self._ok({"list": list(self.active.values())})
+
+    def _user_create(self, query, body):
+        if not body.get("group_id"):
+            return {"code": -1, "msg": "group_id is required"}
+        group_id = str(body.get("group_id", ""))
+        if group_id not in self.groups:
+            return {"code": -1, "msg": f"group_id {group_id} is not exists"}
+        if "cookie" in body and not isinstance(body["cookie"], str):
+            return {"code": -1, "msg": "cookie must be a JSON string"}
+        user_id = self._add_profile(body.get("name", ""), group_id, body.get("user_proxy_config"))
+        return self._ok({"id": user_id})
+
+    def _user_delete(self, query, body):
+        for user_id in body.get("user_ids", []):
+            self.profiles.pop(user_id, None)
+            self.active.pop(user_id, None)
+        return self._ok()
+
+    def _user_update(self, query, body):
+        user_id = body.get("user_id", "")
+        if user_id not in self.profiles:
+            return self._missing(user_id)
+        profile = self.profiles[user_id]
+        for key in ("name", "remark", "user_proxy_config"):
+            if key in body:
+                profile[key] = body[key]
+        return self._ok()
+
+    def _user_regroup(self, query, body):
+        group_id = str(body.get("group_id", ""))
+        if group_id not in self.groups:
+            return {"code": -1, "msg": f"group_id {group_id} is not exists"}
+        user_ids = body.get("user_ids", [])
+        missing = [user_id for user_id in user_ids if user_id not in self.profiles]
+        if missing:
+            return self._missing(missing[0])
+        for user_id in user_ids:
+            self.profiles[user_id]["group_id"] = group_id
+            self.profiles[user_id]["group_name"] = self.groups[group_id]["group_name"]
+        return self._ok()
+
+    def _user_list(self, query, body):
+        items = list(self.profiles.values())
+        if query.get("user_id"):
+            items = [item for item in items if item["user_id"] == query["user_id"]]
+        if query.get("group_id"):
+            items = [item for item in items if item["group_id"] == query["group_id"]]
+        if query.get("user_sort"):
+            for key, order in json.loads(query["user_sort"]).items():
+                items.sort(key=lambda item: int(item.get(key) or 0) if key == "serial_number" else item.get(key, ""),
+                           reverse=order == "desc")
+        page = int(query.get("page", 1))
+        page_size = min(int(query.get("page_size", 1)), 100)
+        return self._ok({"list": items[(page - 1) * page_size:page * page_size], "page": page, "page_size": page_size})
+
+    def _v2_browser_profile_list(self, query, body):
+        wanted = body.get("profile_id")
+        items = [dict(item, profile_id=item["user_id"]) for item in self.profiles.values()
+                 if wanted is None or item["user_id"] in wanted]
+        page = int(body.get("page", 1))
+        limit = int(body.get("limit", 100))
+        return self._ok({"list": items[(page - 1) * limit:page * limit], "page": page, "page_size": limit})
+
+    def _group_list(self, query, body):
+        page = int(query.get("page", 1))
+        page_size = int(query.get("page_size", 1))
+        items = list(self.groups.values())
+        return self._ok({"list": items[(page - 1) * page_size:page * page_size], "page": page, "page_size": page_size})
+
+    def _group_create(self, query, body):
+        group_id = str(len(self.groups) + 1)
+        self.groups[group_id] = {"group_id": group_id, "group_name": body.get("group_name", ""), "remark": ""}
+        return self._ok({"group_id": group_id, "group_name": body.get("group_name", "")})
+
+    def _handler(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持 keep-alive,与真实 Local API 一致
+            disable_nagle_algorithm = True  # 响应头和响应体分两次写出,不关闭 Nagle 会与延迟确认叠加出约 40ms 的额外延迟
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, body):
+                url = urlparse(self.path)
+                path = url.path
+                if path.startswith("/api/v1/"):
+                    endpoint = path[len("/api/v1/"):]
+                elif path.startswith("/api/v2/"):
+                    endpoint = "v2/" + path[len("/api/v2/"):]
+                else:
+                    endpoint = path
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                data = simulator.handle(endpoint, query, body)
+                status = 200 if data is not None else 404  # 与真实服务器一样,未知端点返回 HTTP 404
+                data = json.dumps(data if data is not None else {"code": -1, "msg": "Not Found"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._reply({})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+                self._reply(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 AdsPower Local API 模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50325)
+    parser.add_argument("--latency", type=float, default=None, help="所有端点统一的模拟延迟秒数")
+    parser.add_argument("--start-latency", type=float, default=None, help="browser/start 的模拟延迟秒数")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="每秒允许的请求数")
+    parser.add_argument("--profiles", type=int, default=0, help="预先创建的浏览器用户数量")
+    args = parser.parse_args()
+
+    latency = {}
+    if args.latency is not None:
+        latency = {key: args.latency for key in DEFAULT_LATENCY}
+    if args.start_latency is not None:
+        latency["browser/start"] = args.start_latency
+    simulator = AdsPowerSimulator(args.host, args.port, latency=latency, error_rate=args.error_rate,
+                                  rate_limit=args.rate_limit, profiles=args.profiles)
+    print(f"模拟服务器已启动: {simulator.url}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+
+
+if __name__ == "__main__":
+    main()